@@ -0,0 +1,177 @@
+"""
+Per-repo, per-month activity counts over the whole follow-up period, so
+any sustainability label can be derived without another archive pass.
+
+ActivityMatrixConsumer counts pushes, pull request events, issue events and
+published releases per repo and month since creation, where month m holds
+the events whole days ceil(m * DAYS_PER_MONTH) .. after creation, i.e.
+months 18-23 are exactly days 548-730 (the window sustainability.py uses).
+The result is a repos x kinds x months count matrix saved as one .npz file,
+with a mask of the months the scanned archive range fully covers.
+
+    python activity_matrix.py activity_matrix.npz      # labels for LABEL_DEFINITIONS
+
+writes activity_labels.csv (one 0/1 column per definition) and prints how
+many repos each definition marks sustainable. In code:
+
+    matrix = ActivityMatrix.load("activity_matrix.npz")
+    matrix.label(months=(12, 18), kinds=("push", "pr"), min_active_months=3)
+"""
+import sys
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from gharchive_scanner import Consumer, parse_timestamp
+
+DAYS_PER_MONTH = 30.4375   # 365.25 / 12
+MAX_MONTHS     = 25        # months 0..24 after creation
+
+# Event type -> kind; PullRequest / Issues count every action, releases only "published"
+KINDS       = ["push", "pr", "issue", "release"]
+EVENT_KINDS = {
+    "PushEvent":        0,
+    "PullRequestEvent": 1,
+    "IssuesEvent":      2,
+    "ReleaseEvent":     3,
+}
+
+# ---------------------------------------------------------------
+# LABEL DEFINITIONS for the command line
+# name -> label() arguments; months are [start, end) month indices
+# ---------------------------------------------------------------
+LABEL_DEFINITIONS = {
+    "is_sustainable":               dict(months=(18, 24), kinds=("push",)),
+    "push_m12_18":                  dict(months=(12, 18), kinds=("push",)),
+    "any_m18_24":                   dict(months=(18, 24), kinds=tuple(KINDS)),
+    "push_3_active_months_m18_24":  dict(months=(18, 24), kinds=("push",), min_active_months=3),
+    "push_10_events_m18_24":        dict(months=(18, 24), kinds=("push",), min_events=10),
+}
+
+
+class ActivityMatrixState:
+    """Sparse counts: (repo index, kind, month) packed into one int -> count."""
+    def __init__(self):
+        self.counts = defaultdict(int)
+
+    def merge(self, other):
+        for key, n in other.counts.items():
+            self.counts[key] += n
+        return self
+
+
+class ActivityMatrixConsumer(Consumer):
+    event_types = set(EVENT_KINDS)
+
+    def __init__(self, name, repo_lookup, start_date, end_date, progress_file=None):
+        super().__init__(name, repo_lookup, start_date, end_date, progress_file)
+        self.repos      = list(repo_lookup)
+        self.repo_index = {repo: i for i, repo in enumerate(self.repos)}
+        self.created    = {repo: created.timestamp()
+                           for repo, created in repo_lookup.items() if pd.notna(created)}
+
+    def new_state(self):
+        return ActivityMatrixState()
+
+    def process_event(self, event, state):
+        kind = EVENT_KINDS.get(event.get("type"))
+        if kind is None:
+            return
+        if kind == 3 and event.get("payload", {}).get("action") != "published":
+            return
+
+        repo_name  = event.get("repo", {}).get("name")
+        created    = self.created.get(repo_name)
+        event_time = parse_timestamp(event.get("created_at"))
+        if created is None or event_time is None:
+            return
+
+        days = (event_time - created) // 86400   # whole days, as timedelta.days
+        if days < 0:
+            return
+        month = int(days // DAYS_PER_MONTH)
+        if month >= MAX_MONTHS:
+            return
+        state.counts[(self.repo_index[repo_name] * len(KINDS) + kind) * MAX_MONTHS + month] += 1
+
+    def summary(self):
+        return f"Activity cells: {len(self.state.counts)}"
+
+    def matrix(self):
+        """The scan's counts as an ActivityMatrix."""
+        counts = np.zeros((len(self.repos), len(KINDS), MAX_MONTHS), dtype=np.uint32)
+        if self.state.counts:
+            keys = np.fromiter(self.state.counts.keys(), dtype=np.int64, count=len(self.state.counts))
+            vals = np.fromiter(self.state.counts.values(), dtype=np.int64, count=len(self.state.counts))
+            counts.reshape(-1)[keys] = vals
+
+        # Month m is observed if all of its whole days fall inside the scanned dates
+        created     = pd.to_datetime(pd.Series([self.repo_lookup[r] for r in self.repos], dtype=object), utc=True)
+        created     = created.to_numpy(dtype="datetime64[s]")[:, None]
+        first_day   = np.ceil(np.arange(MAX_MONTHS) * DAYS_PER_MONTH).astype(int)
+        next_day    = np.ceil(np.arange(1, MAX_MONTHS + 1) * DAYS_PER_MONTH).astype(int)
+        scan_start  = np.datetime64(self.start_date.replace(tzinfo=None), "s")
+        scan_end    = np.datetime64((self.end_date + timedelta(days=1)).replace(tzinfo=None), "s")
+        observed    = ((created + first_day * np.timedelta64(1, "D") >= scan_start)
+                       & (created + next_day * np.timedelta64(1, "D") <= scan_end))
+        return ActivityMatrix(self.repos, counts, observed)
+
+
+class ActivityMatrix:
+    def __init__(self, repos, counts, observed):
+        self.repos    = np.asarray(repos, dtype=object)
+        self.counts   = counts      # repos x KINDS x months
+        self.observed = observed    # repos x months: fully inside the scanned range
+
+    def save(self, path):
+        np.savez_compressed(path, repos=self.repos.astype(str), kinds=np.array(KINDS),
+                            counts=self.counts, observed=self.observed)
+        print(f"Saved {path} — {len(self.repos)} repos x {len(KINDS)} kinds x {self.counts.shape[2]} months")
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        if list(data["kinds"]) != KINDS:
+            raise ValueError(f"{path} has kinds {list(data['kinds'])}, expected {KINDS}")
+        return cls(data["repos"], data["counts"], data["observed"])
+
+    def label(self, months=(18, 24), kinds=("push",), min_events=1, min_active_months=1):
+        """
+        1 for repos with at least min_events events of the given kinds in
+        months [start, end), spread over at least min_active_months months.
+        Repos whose window isn't fully observed still get a label (from
+        what was seen); see observed_for().
+        """
+        start, end = months
+        per_month  = self.counts[:, [KINDS.index(k) for k in kinds], start:end].sum(axis=1)
+        sustained  = ((per_month.sum(axis=1) >= min_events)
+                      & ((per_month > 0).sum(axis=1) >= min_active_months))
+        return pd.Series(sustained.astype(int), index=self.repos, name="is_sustainable")
+
+    def observed_for(self, months=(18, 24)):
+        """True for repos whose whole [start, end) month window was scanned."""
+        start, end = months
+        return pd.Series(self.observed[:, start:end].all(axis=1), index=self.repos)
+
+
+def main():
+    path   = sys.argv[1] if len(sys.argv) > 1 else "activity_matrix.npz"
+    matrix = ActivityMatrix.load(path)
+
+    df_labels = pd.DataFrame({name: matrix.label(**definition)
+                              for name, definition in LABEL_DEFINITIONS.items()})
+    df_labels = df_labels.rename_axis("repo_name").reset_index()
+    df_labels.to_csv("activity_labels.csv", index=False)
+
+    print(f"{len(matrix.repos)} repos in {path}")
+    for name, definition in LABEL_DEFINITIONS.items():
+        observed = matrix.observed_for(definition.get("months", (18, 24))).mean() * 100
+        positive = df_labels[name].mean() * 100
+        print(f"  {name:<30} {positive:5.1f}% sustainable ({observed:.0f}% of repos with the window fully scanned)")
+    print("Saved activity_labels.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: contributor_metrics.contributor_health() vs. the original
+per-repo groupby().apply() functions from step4_derived.py.
+Runs both on synthetic step2d_contributors-style tables of growing size,
+checks that they agree exactly and prints the timings.
+
+    python benchmark_contributor_metrics.py [rows ...]
+"""
+import sys, time
+import numpy as np
+import pandas as pd
+
+from contributor_metrics import contributor_health
+
+ROW_COUNTS       = [10_000, 50_000, 200_000]
+ROWS_PER_REPO    = 8      # ~ what step2d_contributors.csv has on average
+CONTRIBUTOR_POOL = 5      # per repo; small pools give realistic retention overlap
+SEED             = 260
+
+
+# ---------------------------------------------------------------
+# ORIGINAL GROUPBY().APPLY() VERSIONS (as in step4_derived.py)
+# ---------------------------------------------------------------
+def bus_factor(group):
+    total = group["commit_count"].sum()
+    if total == 0:
+        return 0
+    sorted_contribs = group["commit_count"].sort_values(ascending=False)
+    cumulative = sorted_contribs.cumsum()
+    n = (cumulative < total * 0.8).sum() + 1
+    return n
+
+def contributor_retention(group):
+    months = sorted(group["month"].unique())
+    if len(months) < 1:
+        return pd.Series({"retention_m3": None, "retention_m6": None})
+
+    m1 = months[0]
+    contribs_m1 = set(group[group["month"] == m1]["contributor"])
+
+    if len(contribs_m1) == 0:
+        return pd.Series({"retention_m3": None, "retention_m6": None})
+
+    retention_m3 = None
+    retention_m6 = None
+
+    if len(months) >= 3:
+        m3 = months[2]
+        contribs_m3 = set(group[group["month"] == m3]["contributor"])
+        retention_m3 = len(contribs_m1 & contribs_m3) / len(contribs_m1)
+
+    if len(months) >= 6:
+        m6 = months[5]
+        contribs_m6 = set(group[group["month"] == m6]["contributor"])
+        retention_m6 = len(contribs_m1 & contribs_m6) / len(contribs_m1)
+
+    return pd.Series({"retention_m3": retention_m3, "retention_m6": retention_m6})
+
+def time_to_first_external(group):
+    months = sorted(group["month"].unique())
+    if len(months) == 0:
+        return None
+    m1_contribs = group[group["month"] == months[0]]["contributor"].tolist()
+    founder = m1_contribs[0] if m1_contribs else None
+    for i, month in enumerate(months):
+        contribs = set(group[group["month"] == month]["contributor"])
+        if founder and (contribs - {founder}):
+            return i
+    return None
+
+def gini(group):
+    vals = group["commit_count"].values.astype(float)
+    if vals.sum() == 0 or len(vals) < 2:
+        return None
+    vals = np.sort(vals)
+    n = len(vals)
+    idx = np.arange(1, n + 1)
+    return (2 * np.sum(idx * vals) / (n * vals.sum())) - (n + 1) / n
+
+def groupby_apply_health(df_contrib_ts):
+    df_contrib_ts = df_contrib_ts.sort_values(["repo_name", "month"])
+    grouped = df_contrib_ts.groupby("repo_name")
+    return (
+        grouped.apply(bus_factor).reset_index().rename(columns={0: "bus_factor"})
+        .merge(grouped.apply(contributor_retention).reset_index(), on="repo_name")
+        .merge(grouped.apply(time_to_first_external).reset_index()
+               .rename(columns={0: "months_to_first_external_contrib"}), on="repo_name")
+        .merge(grouped.apply(gini).reset_index().rename(columns={0: "contributor_gini"}), on="repo_name")
+    )
+
+
+# ---------------------------------------------------------------
+# SYNTHETIC DATA
+# ---------------------------------------------------------------
+def synthetic_contributors(n_rows, seed=SEED):
+    """Random (repo, month, contributor, commit_count) rows, unsorted like step2d output."""
+    rng     = np.random.default_rng(seed)
+    n_repos = max(1, n_rows // ROWS_PER_REPO)
+    repo    = rng.integers(0, n_repos, n_rows)
+    month   = rng.integers(0, 7, n_rows)
+    person  = rng.integers(0, CONTRIBUTOR_POOL, n_rows)
+    df = pd.DataFrame({
+        "repo_name":    [f"owner{r}/repo{r}" for r in repo],
+        "month":        [f"2024-{m + 1:02d}" for m in month],
+        "contributor":  [f"dev{r}_{p}" for r, p in zip(repo, person)],
+        "commit_count": rng.geometric(0.3, n_rows),
+    })
+    # One (repo, month, contributor) row each, as written by Step 2
+    return df.drop_duplicates(["repo_name", "month", "contributor"]).reset_index(drop=True)
+
+
+def main():
+    row_counts = [int(n) for n in sys.argv[1:]] or ROW_COUNTS
+    print(f"{'rows':>10} {'repos':>8} {'apply (s)':>10} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_rows in row_counts:
+        df = synthetic_contributors(n_rows)
+
+        t0 = time.perf_counter()
+        expected = groupby_apply_health(df)
+        t1 = time.perf_counter()
+        actual = contributor_health(df)
+        t2 = time.perf_counter()
+
+        pd.testing.assert_frame_equal(
+            expected.set_index("repo_name").astype(float),
+            actual.set_index("repo_name")[expected.columns[1:]].astype(float),
+            check_exact=True,
+        )
+        print(f"{len(df):>10} {len(actual):>8} {t1 - t0:>10.2f} {t2 - t1:>15.3f} {(t1 - t0) / (t2 - t1):>7.0f}x")
+
+    print("\nAll sizes: identical results.")
+
+
+if __name__ == "__main__":
+    main()
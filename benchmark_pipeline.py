@@ -0,0 +1,222 @@
+"""
+Throughput benchmarks for the pipeline's hot paths, on synthetic data
+(no downloads, no API tokens):
+
+  step2   — events/sec through the archive scan (decompress, pre-filter,
+            json.loads, consumers) on a synthetic archive, and through
+            process_event alone for each Step 2 / sustainability consumer
+  step4   — contributor-metric rows/sec (contributor_metrics.py)
+  xgboost — seconds per fold of train_kfold_xgboost on a synthetic dataset
+
+Every run appends one JSON record (config + results + git commit) to
+RESULTS_FILE, so regressions can be tracked over time.
+
+    python benchmark_pipeline.py                # all benchmarks
+    python benchmark_pipeline.py step2 step4    # just some
+"""
+import contextlib, io, json, os, platform, subprocess, sys, tempfile, time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+import gharchive_scanner
+from gharchive_scanner import ArchiveScanner, LineFilter, iter_events
+from early_activity import EarlyActivityConsumer
+from sustainability import SustainabilityConsumer, WINDOW_START_DAYS
+from contributor_metrics import contributor_health
+from benchmark_contributor_metrics import synthetic_contributors
+import synthetic_gharchive
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+RESULTS_FILE = "benchmark_results.jsonl"
+
+ARCHIVE_HOURS   = 6
+EVENTS_PER_HOUR = 20_000
+REPO_COUNT      = 2_000
+HIT_RATE        = 0.01
+EVENT_MIX       = synthetic_gharchive.EVENT_MIX
+ARCHIVE_START   = datetime(2024, 1, 1)
+
+PROCESS_EVENT_PASSES = 20   # tracked events are few, so time several passes over them
+
+STEP4_ROWS  = 200_000
+XGB_ROWS    = 3_000
+XGB_SPLITS  = 5
+
+BENCHMARKS = ["step2", "step4", "xgboost"]
+
+
+def _quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _result(name, items, seconds, unit):
+    return {"benchmark": name, "items": items, "seconds": round(seconds, 4),
+            "rate": round(items / seconds, 2) if seconds > 0 else None, "unit": unit}
+
+
+# ---------------------------------------------------------------
+# STEP 2 — ARCHIVE SCAN AND CONSUMERS
+# ---------------------------------------------------------------
+def bench_step2():
+    results = []
+    end_date = ARCHIVE_START + timedelta(hours=ARCHIVE_HOURS - 1)
+    df_repos = synthetic_gharchive.make_repos(REPO_COUNT, ARCHIVE_START)
+    early_lookup = dict(zip(df_repos["repo_name"], pd.to_datetime(df_repos["created_at"], utc=True)))
+    # Same repos, created far enough back for the hours to fall in the sustainability window
+    sustain_lookup = {repo: created - timedelta(days=WINDOW_START_DAYS + 30)
+                      for repo, created in early_lookup.items()}
+
+    def consumers():
+        return [EarlyActivityConsumer("early", early_lookup, ARCHIVE_START, end_date),
+                SustainabilityConsumer("sustainability", sustain_lookup, ARCHIVE_START, end_date)]
+
+    with tempfile.TemporaryDirectory() as archive_dir:
+        print(f"Generating {ARCHIVE_HOURS} synthetic hours ({EVENTS_PER_HOUR} events each)...")
+        stats = synthetic_gharchive.write_archive(archive_dir, early_lookup.keys(), ARCHIVE_START,
+                                                  ARCHIVE_HOURS, EVENTS_PER_HOUR, HIT_RATE, EVENT_MIX)
+        print(f"  {stats['events']} events, {stats['tracked_events']} tracked, "
+              f"{stats['bytes'] / 1024**2:.1f} MB compressed")
+
+        process_counts = [1]
+        if gharchive_scanner.PARSE_PROCESSES > 1:
+            process_counts.append(gharchive_scanner.PARSE_PROCESSES)
+        for processes in process_counts:
+            scanner = ArchiveScanner(consumers(), report_every=10**9, processes=processes, source=archive_dir)
+            t0 = time.perf_counter()
+            with _quiet():
+                scanner.run()
+            results.append(_result(f"step2 scan ({processes} process{'es' if processes > 1 else ''})",
+                                   stats["events"], time.perf_counter() - t0, "events/s"))
+
+        # Decode the tracked events once, then time process_event on its own
+        filenames = sorted(f for f in os.listdir(archive_dir) if f.endswith(".json.gz"))
+        line_filter = LineFilter(consumers())
+        events = []
+        for filename in filenames:
+            with open(os.path.join(archive_dir, filename), "rb") as f:
+                events.extend(iter_events(f.read(), line_filter))
+
+    for consumer in consumers():
+        t0 = time.perf_counter()
+        for _ in range(PROCESS_EVENT_PASSES):
+            state = consumer.new_state()
+            for event in events:
+                consumer.process_event(event, state)
+        results.append(_result(f"step2 process_event ({type(consumer).__name__})",
+                               len(events) * PROCESS_EVENT_PASSES, time.perf_counter() - t0, "events/s"))
+    return results
+
+
+# ---------------------------------------------------------------
+# STEP 4 — CONTRIBUTOR METRICS
+# ---------------------------------------------------------------
+def bench_step4():
+    df = synthetic_contributors(STEP4_ROWS)
+    t0 = time.perf_counter()
+    contributor_health(df)
+    return [_result("step4 contributor_health", len(df), time.perf_counter() - t0, "rows/s")]
+
+
+# ---------------------------------------------------------------
+# XGBOOST — K-FOLD TRAINING
+# ---------------------------------------------------------------
+def synthetic_final_dataset(n_rows, seed=synthetic_gharchive.SEED):
+    """final_dataset.csv-like frame with a label that depends on early activity."""
+    rng = np.random.default_rng(seed)
+    commits = rng.negative_binomial(2, 0.05, n_rows)
+    df = pd.DataFrame({
+        "repo_name":                    [f"owner{i}/project{i}" for i in range(n_rows)],
+        "is_fork":                      True,
+        "fork_owner_type":              rng.choice(["User", "Organization"], n_rows),
+        "created_at":                   "2024-01-01T00:00:00Z",
+        "total_commits":                commits,
+        "commit_frequency_per_week":    commits / 26,
+        "unique_commit_authors":        rng.integers(1, 10, n_rows),
+        "issues_opened":                rng.poisson(3, n_rows),
+        "issues_closed":                rng.poisson(2, n_rows),
+        "prs_opened":                   rng.poisson(4, n_rows),
+        "prs_merged":                   rng.poisson(3, n_rows),
+        "star_count":                   rng.poisson(5, n_rows),
+        "avg_issue_first_response_hrs": np.where(rng.random(n_rows) < 0.5, np.nan, rng.exponential(30, n_rows)),
+        "bus_factor":                   rng.integers(1, 5, n_rows),
+        "contributor_gini":             rng.random(n_rows),
+        "retention_m3":                 np.where(rng.random(n_rows) < 0.3, np.nan, rng.random(n_rows)),
+        "has_license":                  rng.integers(0, 2, n_rows),
+        "has_cicd":                     rng.integers(0, 2, n_rows),
+        "primary_language":             rng.choice(["Python", "JavaScript", "Go", "Rust"], n_rows),
+    })
+    score = np.log1p(commits) + rng.normal(0, 1, n_rows)
+    df["is_sustainable"] = (score > np.quantile(score, 0.7)).astype(int)
+    return df
+
+
+def bench_xgboost():
+    from xgboost_model import preprocess, train_kfold_xgboost
+
+    X, y, _ = preprocess(synthetic_final_dataset(XGB_ROWS), is_fork_model=True)
+    t0 = time.perf_counter()
+    with _quiet():
+        train_kfold_xgboost(X, y, "SYNTHETIC", n_splits=XGB_SPLITS)
+    elapsed = time.perf_counter() - t0
+    return [{"benchmark": "xgboost train_kfold_xgboost", "items": XGB_SPLITS, "seconds": round(elapsed, 4),
+             "rate": round(elapsed / XGB_SPLITS, 4), "unit": "s/fold", "rows": XGB_ROWS}]
+
+
+# ---------------------------------------------------------------
+# RUN + RECORD
+# ---------------------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    selected = sys.argv[1:] or BENCHMARKS
+    unknown  = set(selected) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmark(s): {', '.join(sorted(unknown))}. Choose from {', '.join(BENCHMARKS)}.")
+
+    runners = {"step2": bench_step2, "step4": bench_step4, "xgboost": bench_xgboost}
+    results = []
+    skipped = {}
+    for name in selected:
+        print(f"\nRunning {name} benchmark...")
+        try:
+            results.extend(runners[name]())
+        except ImportError as e:
+            # e.g. xgboost / matplotlib not installed here
+            print(f"  Skipped: {e}")
+            skipped[name] = str(e)
+
+    record = {
+        "timestamp":  datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "git_commit": _git_commit(),
+        "python":     platform.python_version(),
+        "platform":   platform.platform(),
+        "cpu_count":  os.cpu_count(),
+        "config": {
+            "archive_hours": ARCHIVE_HOURS, "events_per_hour": EVENTS_PER_HOUR,
+            "repo_count": REPO_COUNT, "hit_rate": HIT_RATE, "event_mix": EVENT_MIX,
+            "parse_processes": gharchive_scanner.PARSE_PROCESSES,
+            "step4_rows": STEP4_ROWS, "xgb_rows": XGB_ROWS, "xgb_splits": XGB_SPLITS,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    with open(RESULTS_FILE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    print(f"\n{'benchmark':<55} {'rate':>14}  unit")
+    for r in results:
+        print(f"{r['benchmark']:<55} {r['rate']:>14,.2f}  {r['unit']}")
+    print(f"\nAppended results to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Check: an incremental Step 4 rerun (step4_incremental.py) writes the same
+final_dataset.csv, byte for byte, as a full run on the same inputs.
+
+Builds synthetic Step 2 / Step 3 fork outputs in a temporary directory,
+runs Step 4 once, changes the inputs of a few repos and reruns it
+incrementally, then deletes the output and fingerprints and runs it in
+full. Each scenario changes a different kind of repo, so the recomputed
+rows sometimes have no missing values where the kept rows do (ints vs
+floats, bools vs objects on the two sides of the upsert).
+
+    python check_step4_incremental.py [repos]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import step4_derived
+from cohorts import FORKS
+
+N_REPOS = 2000
+SEED    = 260
+
+ACTIVITY_COLUMNS = ["total_commits", "unique_commit_authors", "issues_opened", "issues_closed",
+                    "prs_opened", "prs_merged", "prs_rejected", "num_releases", "star_count",
+                    "fork_count", "total_issue_comments", "total_pr_comments"]
+
+
+# ---------------------------------------------------------------
+# SYNTHETIC INPUTS
+# Some repos have no activity, contributor or governance rows, so the
+# merged columns mix values and missing values like the real data.
+# ---------------------------------------------------------------
+def write_inputs(n_repos, rng):
+    names = [f"owner{i}/fork{i}" for i in range(n_repos)]
+    pd.DataFrame({
+        "repo_name":       names,
+        "is_fork":         True,
+        "fork_owner_type": rng.choice(["User", "Organization"], n_repos),
+        "created_at":      "2023-12-05T00:00:00Z",
+    }).to_csv(FORKS.repos_table, index=False)
+
+    activity = pd.DataFrame({"repo_name": names})
+    for col in ACTIVITY_COLUMNS:
+        activity[col] = rng.integers(0, 20, n_repos)
+    activity[rng.random(n_repos) < 0.9].to_csv(FORKS.activity_file, index=False)
+
+    resp = pd.DataFrame({"repo_name": names})
+    for kind in ("issue", "pr"):
+        hrs = np.where(rng.random(n_repos) < 0.3, np.nan, rng.exponential(30, n_repos))
+        resp[f"avg_{kind}_first_response_hrs"]    = hrs
+        resp[f"median_{kind}_first_response_hrs"] = hrs * 0.8
+        resp[f"p90_{kind}_first_response_hrs"]    = hrs * 2.5
+    resp.to_csv(FORKS.responsiveness_file, index=False)
+
+    rows = [(name, f"2024-{m + 1:02d}", f"dev{rng.integers(0, 5)}", int(rng.integers(1, 10)))
+            for name in names
+            for m in range(rng.integers(0, 8))
+            for _ in range(rng.integers(1, 4))]
+    pd.DataFrame(rows, columns=["repo_name", "month", "contributor", "commit_count"]
+                 ).drop_duplicates(["repo_name", "month", "contributor"]
+                 ).to_csv(FORKS.contributors_file, index=False)
+
+    governance = pd.DataFrame({
+        "repo_name":               names,
+        "has_contributing":        rng.random(n_repos) < 0.5,
+        "has_code_of_conduct":     rng.random(n_repos) < 0.2,
+        "has_license":             rng.random(n_repos) < 0.6,
+        "has_cicd":                rng.random(n_repos) < 0.4,
+        "primary_language":        rng.choice(["Python", "Go", "Rust", "None"], n_repos),
+        "topics":                  rng.choice(["", "cli", "null,web", "ml,data"], n_repos),
+        "parent_repo":             "upstream/project",
+        "parent_stars":            rng.integers(0, 1000, n_repos),
+        "parent_forks":            rng.integers(0, 100, n_repos),
+        "parent_created_at":       "2020-01-01T00:00:00Z",
+        "parent_language":         "Python",
+        "early_commits_on_branch": rng.integers(0, 50, n_repos),
+        "parent_early_commits":    rng.integers(0, 50, n_repos),
+        "divergence_ratio":        rng.random(n_repos) / 3,
+    })
+    governance[rng.random(n_repos) < 0.85].to_csv(FORKS.governance_file, index=False)
+    return names
+
+
+def change_repos(repos, rng):
+    """Give repos new activity counts and commit counts."""
+    activity = pd.read_csv(FORKS.activity_file)
+    hit = activity["repo_name"].isin(repos)
+    activity.loc[hit, "total_commits"] = rng.integers(20, 40, hit.sum())
+    activity.to_csv(FORKS.activity_file, index=False)
+
+    contributors = pd.read_csv(FORKS.contributors_file)
+    hit = contributors["repo_name"].isin(repos)
+    contributors.loc[hit, "commit_count"] = rng.integers(1, 10, hit.sum())
+    contributors.to_csv(FORKS.contributors_file, index=False)
+
+
+# ---------------------------------------------------------------
+# SCENARIOS: which repos change between the two runs
+# ---------------------------------------------------------------
+def complete_repos(names):
+    """Repos with rows in every input, so their recomputed rows have no missing values."""
+    present = set(names)
+    for path in (FORKS.activity_file, FORKS.contributors_file, FORKS.governance_file):
+        present &= set(pd.read_csv(path)["repo_name"])
+    return [name for name in names if name in present]
+
+
+def incomplete_repos(names):
+    """Repos without contributor rows."""
+    with_contributors = set(pd.read_csv(FORKS.contributors_file)["repo_name"])
+    return [name for name in names if name not in with_contributors]
+
+
+SCENARIOS = {
+    "complete repos":   lambda names, rng: rng.choice(complete_repos(names), 5, replace=False),
+    "incomplete repos": lambda names, rng: rng.choice(incomplete_repos(names), 5, replace=False),
+    "random 10%":       lambda names, rng: rng.choice(names, len(names) // 10, replace=False),
+}
+
+
+def run_step4():
+    with contextlib.redirect_stdout(io.StringIO()):
+        step4_derived.build_final_dataset(FORKS)
+    with open(FORKS.dataset_file, "rb") as f:
+        return f.read()
+
+
+def main():
+    n_repos = int(sys.argv[1]) if len(sys.argv) > 1 else N_REPOS
+    failed  = []
+    for name, pick in SCENARIOS.items():
+        rng = np.random.default_rng(SEED)
+        with tempfile.TemporaryDirectory() as tmp, contextlib.chdir(tmp):
+            names = write_inputs(n_repos, rng)
+            run_step4()
+            changed = pick(names, rng)
+            change_repos(set(changed), rng)
+
+            incremental = run_step4()
+            os.remove(FORKS.dataset_file)
+            os.remove(os.path.splitext(FORKS.dataset_file)[0] + ".fingerprints.json")
+            full = run_step4()
+
+        same = incremental == full
+        print(f"  {name:<18} {len(changed):>5} repos changed: {'identical' if same else 'DIFFERENT'}")
+        if not same:
+            failed.append(name)
+
+    if failed:
+        sys.exit(f"\nIncremental output differs from a full run: {', '.join(failed)}")
+    print("\nAll scenarios: incremental rerun identical to a full run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+The two cohorts the pipeline runs on: forks and non-forks.
+
+Every step (step2_local.py, step3_graphql.py, step4_derived.py,
+sustainability_labels.py, single_pass_scan.py, step2_from_event_store.py)
+takes a list of cohorts and handles them in one run, so both share one
+archive scan or one GraphQL session. Name cohorts on the command line, or
+"all"; with none, the per-step scripts run the forks only (as before the
+non-fork cohort existed), while single_pass_scan.py and
+step2_from_event_store.py run both:
+
+    python step3_graphql.py                # forks
+    python step3_graphql.py nonforks       # same as nonfork_step3_graphql.py
+    python step3_graphql.py all            # forks and non-forks, one session
+
+A cohort's files differ only by a suffix (repos_table.csv vs
+repos_table_nonfork.csv, progress.txt vs progress_nonfork.txt, ...).
+"""
+import sys
+
+
+class Cohort:
+    def __init__(self, name, suffix, divergence):
+        self.name       = name
+        self.divergence = divergence   # fetch parent metadata + early divergence in Step 3
+
+        # Step 0 / Step 2
+        self.repos_table         = f"repos_table{suffix}.csv"
+        self.activity_file       = f"step2b_activity{suffix}.csv"
+        self.responsiveness_file = f"step2c_responsiveness{suffix}.csv"
+        self.contributors_file   = f"step2d_contributors{suffix}.csv"
+        self.step2_progress      = f"progress{suffix}.txt"
+
+        # Step 3
+        self.governance_file     = f"step3_governance_metadata{suffix}.csv"
+        self.step3_progress      = f"step3_progress{suffix}.txt"
+
+        # Step 4 + sustainability labels
+        self.dataset_file        = f"final_dataset{suffix}.csv"
+        self.labels_file         = f"sustainability_labels{suffix}.csv"
+        self.sustain_progress    = f"sustainability_progress{suffix}.txt"
+        self.matrix_file         = f"activity_matrix{suffix}.npz"
+
+    def __repr__(self):
+        return f"Cohort({self.name!r})"
+
+
+FORKS    = Cohort("forks",    "",         divergence=True)
+NONFORKS = Cohort("nonforks", "_nonfork", divergence=False)
+COHORTS  = [FORKS, NONFORKS]
+
+
+def selected(names=None, default=(FORKS,)):
+    """The cohorts named in names (default: sys.argv[1:]); "all" for every one, none for default."""
+    names = sys.argv[1:] if names is None else names
+    if not names:
+        return list(default)
+    if names == ["all"]:
+        return COHORTS
+    by_name = {cohort.name: cohort for cohort in COHORTS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise SystemExit(f"Unknown cohort(s) {unknown}; choose from {list(by_name)}")
+    return [by_name[name] for name in names]
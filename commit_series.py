@@ -1,16 +1,23 @@
 import json
-import requests
+import os
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict
 import asyncio
-import aiohttp
+
+from github_client import AsyncGraphQLClient
+from response_cache import ResponseCache
 
 GITHUB_API_URL = "https://api.github.com/graphql"
-GITHUB_TOKEN='your-token'
+GITHUB_TOKENS = ['your-token']  # one or more; requests rotate across them
+
+INPUT_FILE  = "forked.json"
+OUTPUT_FILE = "commit_timeseries.jsonl"   # one result per line, appended as each repo finishes
+
+# Repos fetched at once. Each worker picks up the next repo as soon as
+# its last one is done, so one slow repo doesn't hold up the others.
+REPOS_IN_FLIGHT = 100
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}"
-}
 
 QUERY = """
 query($owner: String!, $name: String!, $since: GitTimestamp!, $cursor: String) {
@@ -36,7 +43,7 @@ query($owner: String!, $name: String!, $since: GitTimestamp!, $cursor: String) {
 }
 """
 
-async def fetch_commit_dates(session, owner, name, since):
+async def fetch_commit_dates(client, owner, name, since):
     cursor = None
     dates = []
 
@@ -48,13 +55,10 @@ async def fetch_commit_dates(session, owner, name, since):
             "cursor": cursor
         }
 
-        async with session.post(
-            GITHUB_API_URL,
-            json={"query": QUERY, "variables": variables},
-            headers=HEADERS,
-        ) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
+        data = await client.execute(QUERY, variables)
+        if data is None:
+            print(f"Request failed for {owner}/{name}")
+            return None
 
         # print(data['data'])
 
@@ -99,8 +103,7 @@ def monthly_timeseries(commit_dates):
 
     return dict(sorted(counts.items()))
 
-async def process_repo(session, repoStr):
-    repo = json.loads(repoStr)
+async def process_repo(client, repo):
     payload = json.loads(repo['payload'])['forkee']
     childOwner, childName = payload['full_name'].split('/')
     # print(repo['repo'].keys())
@@ -111,7 +114,7 @@ async def process_repo(session, repoStr):
     since = datetime.strptime(forkTime, '%Y-%m-%dT%H:%M:%SZ')
     # print(f"Fetching {childName}...")
 
-    dates = await fetch_commit_dates(session, childOwner, childName, since)
+    dates = await fetch_commit_dates(client, childOwner, childName, since)
     # print(f'dates: {dates}')
     return {
         'parentName': parentName,
@@ -123,35 +126,68 @@ async def process_repo(session, repoStr):
     }
     
 
-async def main():
+def load_done(path):
+    """childOwner/childName of the results already in path, for resume."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as f:
+        data = f.read()
+        # Drop a line left half-written by an interrupted run
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.splitlines():
+        result = json.loads(line)
+        done.add(f"{result['childOwner']}/{result['childName']}")
+    return done
+
 
-    with open("forked.json") as f:
-        repos = f.readlines()
-
-    results = []
-    num_threads = 100
-    start_repo_i = 16800
-    end_repo_i = 19000
-    write_filename = "commit_timeseries12.json"
-    async with aiohttp.ClientSession() as session:
-        for i in range(start_repo_i, end_repo_i, num_threads):
-            print(f'starting {i+1}th request')
-            end = min(end_repo_i, i + num_threads)
-            tasks = [
-                process_repo(session, repoStr)
-                for repoStr in repos[i:end]
-
-            ]
-            results += await asyncio.gather(*tasks, return_exceptions=True)
-            print(results)
-            with open(write_filename, "w") as f:
-                json.dump(results, f, indent=2)
-    # print(results)
-
-    with open(write_filename, "w") as f:
-        json.dump(results, f, indent=2)
+async def main():
+    done = load_done(OUTPUT_FILE)
+    if done:
+        print(f"Resuming — {len(done)} repos already in {OUTPUT_FILE}")
+
+    written    = 0
+    failed     = 0
+    start_time = time.time()
+
+    # Answers we already have are reused on reruns (see response_cache.py)
+    cache = ResponseCache()
+    async with AsyncGraphQLClient(GITHUB_TOKENS, GITHUB_API_URL, cache=cache) as client:
+        with open(INPUT_FILE) as fin, open(OUTPUT_FILE, "a") as fout:
+            todo = (line for line in fin if line.strip())
+
+            async def worker():
+                nonlocal written, failed
+                for line in todo:
+                    full_name = None
+                    try:
+                        repo = json.loads(line)
+                        full_name = json.loads(repo['payload'])['forkee']['full_name']
+                        if full_name in done:
+                            continue
+                        done.add(full_name)
+                        result = await process_repo(client, repo)
+                    except Exception as e:
+                        # Not written, so it is retried on the next run
+                        print(f"Error on {full_name or line[:80].strip()}: {e!r}")
+                        failed += 1
+                        continue
+
+                    fout.write(json.dumps(result) + "\n")
+                    fout.flush()
+                    written += 1
+                    if written % 100 == 0:
+                        elapsed = (time.time() - start_time) / 60
+                        print(f"  {written} repos written, {failed} failed | Elapsed: {elapsed:.0f}m")
+
+            await asyncio.gather(*(worker() for _ in range(REPOS_IN_FLIGHT)))
+        print(client.metrics.summary())
+
+    print(cache.summary())
+    print(f"Wrote {written} repos to {OUTPUT_FILE} ({failed} failed, rerun to retry them)")
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-
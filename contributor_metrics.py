@@ -0,0 +1,104 @@
+"""
+Contributor health metrics for Step 4, computed for all repos at once.
+Shared by step4_derived.py and nonfork_step4_derived.py.
+
+Gives the same numbers as the per-repo groupby().apply() versions
+(kept in benchmark_contributor_metrics.py for comparison), but works on
+sorted NumPy arrays: rows are grouped by repo, months are turned into
+per-repo ordinals, and every metric is a segment reduction over the groups.
+"""
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ["bus_factor", "retention_m3", "retention_m6",
+                  "months_to_first_external_contrib", "contributor_gini"]
+
+
+def contributor_health(df_contrib_ts):
+    """
+    repo_name + the four contributor metrics, from step2d_contributors*.csv
+    rows (repo_name, month, contributor, commit_count). As in the original
+    functions, every row counts as one entry (a contributor in a month).
+    """
+    df = df_contrib_ts[df_contrib_ts["repo_name"].notna()]
+    # Multi-column sorts are stable, so the founder is the first row of month 1 in file order
+    df = df.sort_values(["repo_name", "month"])
+    if df.empty:
+        return pd.DataFrame(columns=["repo_name"] + METRIC_COLUMNS)
+
+    repo_names  = df["repo_name"].to_numpy()
+    months      = df["month"].to_numpy()
+    contributor = pd.factorize(df["contributor"])[0] + 1   # NaN -> 0, equal to itself
+    counts      = df["commit_count"].to_numpy()
+
+    # ---------------------------------------------------------------
+    # GROUPS: repo id per row, first row of each repo, month ordinals
+    # ---------------------------------------------------------------
+    new_repo  = np.r_[True, repo_names[1:] != repo_names[:-1]]
+    repo      = np.cumsum(new_repo) - 1
+    starts    = np.flatnonzero(new_repo)
+    sizes     = np.diff(np.r_[starts, len(df)])
+    n_repos   = len(starts)
+
+    new_month = new_repo | np.r_[True, months[1:] != months[:-1]]
+    month_seq = np.cumsum(new_month) - 1
+    ordinal   = month_seq - month_seq[starts][repo]          # 0 = first active month
+    n_months  = np.maximum.reduceat(ordinal, starts) + 1
+
+    # ---------------------------------------------------------------
+    # 1. BUS FACTOR
+    # Minimum number of contributors responsible for >= 80% of commits
+    # ---------------------------------------------------------------
+    total      = np.add.reduceat(counts, starts)
+    desc       = counts[np.lexsort((-counts, repo))]
+    cumulative = np.cumsum(desc)
+    cumulative = cumulative - (cumulative[starts] - desc[starts])[repo]
+    below      = cumulative < (total * 0.8)[repo]
+    bus_factor = np.where(total == 0, 0, np.add.reduceat(below, starts) + 1)
+
+    # ---------------------------------------------------------------
+    # 2. CONTRIBUTOR RETENTION
+    # % of month-1 contributors still contributing in the 3rd and 6th active month
+    # ---------------------------------------------------------------
+    width     = contributor.max() + 1
+    key       = repo * width + contributor
+    first     = np.unique(key[ordinal == 0])
+    n_first   = np.bincount(first // width, minlength=n_repos)
+
+    def retention(month_index):
+        later    = np.unique(key[ordinal == month_index])
+        retained = np.bincount(later[np.isin(later, first)] // width, minlength=n_repos)
+        return np.where(n_months > month_index, retained / n_first, np.nan)
+
+    # ---------------------------------------------------------------
+    # 3. TIME TO FIRST EXTERNAL CONTRIBUTION
+    # First month where someone other than the first contributor appears
+    # ---------------------------------------------------------------
+    founder  = contributor[starts]
+    external = np.where(contributor != founder[repo], ordinal, n_months.max())
+    first_external = np.minimum.reduceat(external, starts).astype(float)
+    first_external[first_external >= n_months] = np.nan
+
+    # ---------------------------------------------------------------
+    # 4. GINI COEFFICIENT
+    # 0 = perfectly equal, 1 = one person does everything
+    # ---------------------------------------------------------------
+    asc   = counts[np.lexsort((counts, repo))].astype(float)
+    rank  = np.arange(len(df)) - starts[repo] + 1
+    sums  = np.add.reduceat(asc, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gini = (2 * np.add.reduceat(rank * asc, starts) / (sizes * sums)) - (sizes + 1) / sizes
+    gini[(sums == 0) | (sizes < 2)] = np.nan
+
+    result = pd.DataFrame({
+        "repo_name":                        repo_names[starts],
+        "bus_factor":                       bus_factor,
+        "retention_m3":                     retention(2),
+        "retention_m6":                     retention(5),
+        "months_to_first_external_contrib": first_external,
+        "contributor_gini":                 gini,
+    })
+    # The apply() version only gave a float column when some repo had no external contributor
+    if result["months_to_first_external_contrib"].notna().all():
+        result["months_to_first_external_contrib"] = result["months_to_first_external_contrib"].astype(int)
+    return result
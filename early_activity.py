@@ -0,0 +1,239 @@
+"""
+Step 2 early-period metrics as a GH Archive scanner consumer.
+Shared by step2_local.py, nonfork_step2_local.py and single_pass_scan.py.
+"""
+from collections import defaultdict
+import time
+import pandas as pd
+
+from gharchive_scanner import Consumer, parse_timestamp
+from response_times import ResponseTimes, response_stats
+
+EARLY_DAYS = 182  # 6 months
+
+RESPONSIVENESS_COLUMNS = [
+    "avg_issue_first_response_hrs", "avg_pr_first_response_hrs",
+    "median_issue_first_response_hrs", "median_pr_first_response_hrs",
+    "p90_issue_first_response_hrs", "p90_pr_first_response_hrs",
+]
+
+
+def _month_counts():
+    return defaultdict(_contributor_counts)
+
+def _contributor_counts():
+    return defaultdict(int)
+
+
+class EarlyActivityState:
+    """
+    Per-repo accumulators for one consumer. Partial states built from
+    different hours (e.g. in worker processes) are combined with merge(),
+    which must be applied in archive order.
+    """
+    COUNTERS = [
+        "commits", "issues_opened", "issues_closed", "prs_opened", "prs_merged",
+        "prs_rejected", "releases", "stars", "forks_count",
+        "issue_comments", "pr_comments",
+    ]
+
+    def __init__(self):
+        # ---------------------------------------------------------------
+        # ACCUMULATORS — one entry per repo
+        # ---------------------------------------------------------------
+        self.commits        = defaultdict(int)
+        self.commit_authors = defaultdict(set)
+        self.issues_opened  = defaultdict(int)
+        self.issues_closed  = defaultdict(int)
+        self.prs_opened     = defaultdict(int)
+        self.prs_merged     = defaultdict(int)
+        self.prs_rejected   = defaultdict(int)
+        self.releases       = defaultdict(int)
+        self.stars          = defaultdict(int)
+        self.forks_count    = defaultdict(int)
+        self.issue_comments = defaultdict(int)
+        self.pr_comments    = defaultdict(int)
+
+        # For responsiveness — (repo, number) -> opened_at / first response,
+        # as epoch seconds in compact arrays (see response_times.py)
+        self.issue_times = ResponseTimes()
+        self.pr_times    = ResponseTimes()
+
+        # For contributor time series
+        self.contributor_months = defaultdict(_month_counts)
+        # contributor_months[repo][month][contributor] = count
+
+    def merge(self, other):
+        """Fold a later partial state into this one."""
+        for name in self.COUNTERS:
+            mine = getattr(self, name)
+            for repo, count in getattr(other, name).items():
+                mine[repo] += count
+
+        for repo, authors in other.commit_authors.items():
+            self.commit_authors[repo] |= authors
+
+        # First open: the earliest-seen event wins; first response: the minimum
+        self.issue_times.merge(other.issue_times)
+        self.pr_times.merge(other.pr_times)
+
+        for repo, months in other.contributor_months.items():
+            for month, contributors in months.items():
+                target = self.contributor_months[repo][month]
+                for contributor, count in contributors.items():
+                    target[contributor] += count
+        return self
+
+
+class EarlyActivityConsumer(Consumer):
+    def __init__(self, name, repo_lookup, start_date, end_date, progress_file=None,
+                 early_days=EARLY_DAYS):
+        super().__init__(name, repo_lookup, start_date, end_date, progress_file)
+        self.early_days = early_days
+        # repo -> (created, created + early_days) in epoch seconds, so the
+        # early-period check is two comparisons (repos without a date never match)
+        self.early_bounds = {
+            repo: (created.timestamp(), created.timestamp() + early_days * 86400)
+            for repo, created in repo_lookup.items() if pd.notna(created)
+        }
+
+    def new_state(self):
+        return EarlyActivityState()
+
+    # ---------------------------------------------------------------
+    # HELPER: check if event is within early period for the repo
+    # ---------------------------------------------------------------
+    def in_early_period(self, repo_name, event_time):
+        """event_time in epoch seconds."""
+        bounds = self.early_bounds.get(repo_name)
+        return bounds is not None and bounds[0] <= event_time <= bounds[1]
+
+    # ---------------------------------------------------------------
+    # HELPER: process one event
+    # ---------------------------------------------------------------
+    def process_event(self, event, state):
+        repo_name  = event.get("repo", {}).get("name")
+        event_type = event.get("type")
+        actor      = event.get("actor", {}).get("login", "")
+
+        if repo_name not in self.repo_set:
+            return
+
+        event_time = parse_timestamp(event.get("created_at"))
+        if event_time is None or not self.in_early_period(repo_name, event_time):
+            return
+
+        payload = event.get("payload", {})
+
+        if event_type == "PushEvent":
+            month = time.strftime("%Y-%m", time.gmtime(event_time))
+            state.commits[repo_name] += 1
+            state.commit_authors[repo_name].add(actor)
+            state.contributor_months[repo_name][month][actor] += 1
+
+        elif event_type == "IssuesEvent":
+            action = payload.get("action")
+            if action == "opened":
+                state.issues_opened[repo_name] += 1
+                issue_num = payload.get("issue", {}).get("number")
+                opened_at = parse_timestamp(payload.get("issue", {}).get("created_at", ""))
+                if isinstance(issue_num, int) and opened_at is not None:
+                    state.issue_times.open(repo_name, issue_num, opened_at)
+            elif action == "closed":
+                state.issues_closed[repo_name] += 1
+
+        elif event_type == "PullRequestEvent":
+            action = payload.get("action")
+            merged = payload.get("pull_request", {}).get("merged", False)
+            if action == "opened":
+                state.prs_opened[repo_name] += 1
+                pr_num    = payload.get("pull_request", {}).get("number")
+                opened_at = parse_timestamp(payload.get("pull_request", {}).get("created_at", ""))
+                if isinstance(pr_num, int) and opened_at is not None:
+                    state.pr_times.open(repo_name, pr_num, opened_at)
+            elif action == "closed":
+                if merged:
+                    state.prs_merged[repo_name]   += 1
+                else:
+                    state.prs_rejected[repo_name] += 1
+
+        elif event_type == "IssueCommentEvent":
+            state.issue_comments[repo_name] += 1
+            issue_num = payload.get("issue", {}).get("number")
+            if isinstance(issue_num, int):
+                state.issue_times.respond(repo_name, issue_num, event_time)
+
+        elif event_type == "PullRequestReviewCommentEvent":
+            state.pr_comments[repo_name] += 1
+            pr_num = payload.get("pull_request", {}).get("number")
+            if isinstance(pr_num, int):
+                state.pr_times.respond(repo_name, pr_num, event_time)
+
+        elif event_type == "ReleaseEvent":
+            if payload.get("action") == "published":
+                state.releases[repo_name] += 1
+
+        elif event_type == "WatchEvent":
+            if payload.get("action") == "started":
+                state.stars[repo_name] += 1
+
+        elif event_type == "ForkEvent":
+            state.forks_count[repo_name] += 1
+
+    def summary(self):
+        return f"Repos with commits: {len(self.state.commits)}"
+
+    # ---------------------------------------------------------------
+    # BUILD OUTPUT FILES
+    # ---------------------------------------------------------------
+    def write_outputs(self, activity_file, responsiveness_file, contributors_file):
+        print(f"\nBuilding {self.name} output files...")
+        st = self.state
+
+        # Activity metrics
+        activity_rows = []
+        for repo in self.repo_set:
+            activity_rows.append({
+                "repo_name":             repo,
+                "total_commits":         st.commits[repo],
+                "unique_commit_authors": len(st.commit_authors[repo]),
+                "issues_opened":         st.issues_opened[repo],
+                "issues_closed":         st.issues_closed[repo],
+                "prs_opened":            st.prs_opened[repo],
+                "prs_merged":            st.prs_merged[repo],
+                "prs_rejected":          st.prs_rejected[repo],
+                "num_releases":          st.releases[repo],
+                "star_count":            st.stars[repo],
+                "fork_count":            st.forks_count[repo],
+                "total_issue_comments":  st.issue_comments[repo],
+                "total_pr_comments":     st.pr_comments[repo],
+            })
+        df_activity = pd.DataFrame(activity_rows)
+        df_activity.to_csv(activity_file, index=False)
+        print(f"Saved {activity_file} — {len(df_activity)} repos")
+        print(f"  Repos with commits: {(df_activity['total_commits'] > 0).sum()}")
+
+        # Responsiveness metrics: mean, median and p90 hours to first response,
+        # in one vectorized pass over the reduced open/response arrays
+        df_resp = pd.concat([
+            response_stats(*st.issue_times.hours(), "issue"),
+            response_stats(*st.pr_times.hours(),    "pr"),
+        ], axis=1).reindex(list(self.repo_set))[RESPONSIVENESS_COLUMNS]
+        df_resp = df_resp.rename_axis("repo_name").reset_index()
+        df_resp.to_csv(responsiveness_file, index=False)
+        print(f"Saved {responsiveness_file}")
+
+        # Contributor time series
+        contrib_rows = []
+        for repo, months in st.contributor_months.items():
+            for month, contributors in months.items():
+                for contributor, count in contributors.items():
+                    contrib_rows.append({
+                        "repo_name":    repo,
+                        "month":        month,
+                        "contributor":  contributor,
+                        "commit_count": count,
+                    })
+        df_contrib = pd.DataFrame(contrib_rows)
+        df_contrib.to_csv(contributors_file, index=False)
+        print(f"Saved {contributors_file} — {len(df_contrib)} contributor-month records")
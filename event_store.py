@@ -0,0 +1,202 @@
+"""
+Columnar store of every GH Archive event that touches a tracked repo.
+
+The scanner consumers compute their metrics while streaming and drop the
+events, so changing EARLY_DAYS, the responsiveness logic or the event
+types used would normally mean downloading the archive again. With an
+EventStoreConsumer in the scan, the tracked events are also written to a
+Parquet dataset partitioned by month and event type, with typed columns
+repo_name, actor, created_at, action, number (issue / PR number),
+opened_at (issue / PR created_at) and merged. The partition directories
+add month and type back as columns when the store is read with
+pd.read_parquet(store_dir). See step2_from_event_store.py.
+
+    event_store/month=2023-12/type=PushEvent/part-<first hour>-<id>.parquet
+
+<first hour> is zero-padded (2023-12-02-05), so reading the files in
+path order, as pyarrow does, gives the events in archive order.
+
+Needs pyarrow (pip install pyarrow).
+"""
+import os, uuid
+from collections import defaultdict
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from gharchive_scanner import Consumer
+
+FLUSH_HOURS = 24   # write a set of Parquet files every N parsed hours
+
+COLUMNS = ["repo_name", "actor", "created_at", "action", "number", "opened_at", "merged"]
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The event store needs pyarrow: pip install pyarrow")
+
+
+def _schema():
+    return pa.schema([
+        ("repo_name",  pa.string()),
+        ("actor",      pa.string()),
+        ("created_at", pa.timestamp("s", tz="UTC")),
+        ("action",     pa.string()),
+        ("number",     pa.int64()),
+        ("opened_at",  pa.timestamp("s", tz="UTC")),
+        ("merged",     pa.bool_()),
+    ])
+
+
+def _new_partition():
+    return {col: [] for col in COLUMNS}
+
+
+class EventStoreState:
+    """Buffered rows per (month, event type) partition, in archive order."""
+    def __init__(self):
+        self.partitions = defaultdict(_new_partition)
+        self.rows       = 0
+
+    def merge(self, other):
+        for key, columns in other.partitions.items():
+            target = self.partitions[key]
+            for col in COLUMNS:
+                target[col].extend(columns[col])
+        self.rows += other.rows
+        return self
+
+
+def _int_or_none(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _str_or_none(value):
+    return value if isinstance(value, str) else None
+
+
+class EventStoreConsumer(Consumer):
+    """
+    Keeps every event for its repos between start_date and end_date.
+    Rows are buffered and written every FLUSH_HOURS hours; an hour only
+    goes into the progress file once its rows are on disk, so a resumed
+    run picks up after the last flush.
+    """
+    def __init__(self, name, repo_lookup, start_date, end_date, store_dir,
+                 progress_file=None, flush_hours=FLUSH_HOURS):
+        _require_pyarrow()
+        super().__init__(name, repo_lookup, start_date, end_date, progress_file)
+        self.store_dir     = store_dir
+        self.flush_hours   = flush_hours
+        self.pending_hours = []
+        self.written_rows  = 0
+        os.makedirs(store_dir, exist_ok=True)
+
+    def new_state(self):
+        return EventStoreState()
+
+    def process_event(self, event, state):
+        repo_name = event.get("repo", {}).get("name")
+        if repo_name not in self.repo_set:
+            return
+        created_at = event.get("created_at")
+        if not isinstance(created_at, str):
+            return
+
+        event_type = event.get("type")
+        payload    = event.get("payload") or {}
+        item       = {}
+        if event_type in ("IssuesEvent", "IssueCommentEvent"):
+            item = payload.get("issue") or {}
+        elif event_type in ("PullRequestEvent", "PullRequestReviewCommentEvent"):
+            item = payload.get("pull_request") or {}
+
+        row = state.partitions[(created_at[:7], str(event_type))]
+        row["repo_name"].append(repo_name)
+        row["actor"].append(_str_or_none((event.get("actor") or {}).get("login", "")))
+        row["created_at"].append(created_at)
+        row["action"].append(_str_or_none(payload.get("action")))
+        row["number"].append(_int_or_none(item.get("number")))
+        row["opened_at"].append(_str_or_none(item.get("created_at")))
+        row["merged"].append(item.get("merged") if event_type == "PullRequestEvent"
+                             and isinstance(item.get("merged"), bool) else None)
+        state.rows += 1
+
+    def mark_done(self, filename):
+        # Progress is written in flush(), once the hour's rows are saved
+        self.done_files.add(filename)
+        self.pending_hours.append(filename)
+        if len(self.pending_hours) >= self.flush_hours:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows and record their hours as done."""
+        if not self.pending_hours:
+            return
+        part_name = f"part-{_sortable_hour(self.pending_hours[0])}-{uuid.uuid4().hex[:8]}.parquet"
+        schema    = _schema()
+
+        for (month, event_type), columns in self.state.partitions.items():
+            table = pa.table({
+                "repo_name":  pa.array(columns["repo_name"], pa.string()),
+                "actor":      pa.array(columns["actor"],     pa.string()),
+                "created_at": _timestamps(columns["created_at"]),
+                "action":     pa.array(columns["action"],    pa.string()),
+                "number":     pa.array(columns["number"],    pa.int64()),
+                "opened_at":  _timestamps(columns["opened_at"]),
+                "merged":     pa.array(columns["merged"],    pa.bool_()),
+            }, schema=schema)
+            directory = os.path.join(self.store_dir, f"month={month}", f"type={event_type}")
+            os.makedirs(directory, exist_ok=True)
+            tmp = os.path.join(directory, f".{part_name}.tmp")   # dot files are skipped by readers
+            pq.write_table(table, tmp)
+            os.replace(tmp, os.path.join(directory, part_name))
+
+        self.written_rows += self.state.rows
+        if self.progress_file:
+            with open(self.progress_file, "a") as pf:
+                pf.write("".join(f + "\n" for f in self.pending_hours))
+        self.pending_hours = []
+        self.state = self.new_state()
+
+    def finish(self):
+        self.flush()
+        print(f"[{self.name}] {self.written_rows} events written to {self.store_dir}")
+
+    def summary(self):
+        return f"Events stored: {self.written_rows + self.state.rows}"
+
+
+def _sortable_hour(filename):
+    """2023-12-2-5.json.gz -> 2023-12-02-05"""
+    year, month, day, hour = filename.replace(".json.gz", "").split("-")
+    return f"{year}-{month}-{int(day):02d}-{int(hour):02d}"
+
+
+def _timestamps(values):
+    strings = pa.array(values, pa.string())
+    parsed  = pc.strptime(strings, format=TIME_FORMAT, unit="s", error_is_null=True)
+    return parsed.cast(pa.timestamp("s", tz="UTC"))
+
+
+def read_event_store(store_dir, event_types=None, repos=None):
+    """
+    Load the store (or just some event types / repos) as a DataFrame with
+    the stored columns plus month and type.
+    """
+    _require_pyarrow()
+    filters = []
+    if event_types is not None:
+        filters.append(("type", "in", sorted(event_types)))
+    if repos is not None:
+        filters.append(("repo_name", "in", sorted(repos)))
+    df = pd.read_parquet(store_dir, engine="pyarrow", filters=filters or None)
+    for col in ["month", "type"]:
+        df[col] = df[col].astype(str)
+    return df
@@ -1,13 +1,18 @@
 import json
-import requests
 from datetime import datetime, timedelta
 from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 
+from github_client import GraphQLClient
+from monthly_commits import monthly_commit_counts, commits_post_2m
+from response_cache import ResponseCache
+
 GITHUB_API_URL = "https://api.github.com/graphql"
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}"
-}
+GITHUB_TOKENS  = [""]   # one or more personal access tokens; requests rotate across them
+
+# True: commitTimes from one query of per-month history totals per repo
+# (see monthly_commits.py). False: page through every commit since the fork.
+MONTHLY_COUNTS = True
 
 
 # fetches commit history from a repository’s default branch since a given timestamp
@@ -58,7 +63,7 @@ query($owner: String!, $name: String!) {
 }
 """
 
-def fetch_commit_dates(owner, name, since):
+def fetch_commit_dates(client, owner, name, since):
     cursor = None
     dates = []
     while True:
@@ -68,13 +73,10 @@ def fetch_commit_dates(owner, name, since):
             "since": since.isoformat() + "Z",
             "cursor": cursor
         }
-        resp = requests.post(
-            GITHUB_API_URL,
-            json={"query": QUERY, "variables": variables},
-            headers=HEADERS,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = client.execute(QUERY, variables)
+        if data is None:
+            print(f"Request failed for {owner}/{name}")
+            return None
 
         if "errors" in data:
             print("GraphQL error:", data["errors"])
@@ -134,7 +136,7 @@ def commitsPost2m(commit_dates):
     return total
 
 
-def fetch_issues(owner, name, since):
+def fetch_issues(client, owner, name, since):
     cursor = None
 
     while True:
@@ -145,14 +147,9 @@ def fetch_issues(owner, name, since):
             "cursor": cursor
         }
 
-        resp = requests.post(
-            GITHUB_API_URL,
-            json={"query": QUERY2, "variables": variables},
-            headers=HEADERS,
-        )
-
-        resp.raise_for_status()
-        data = resp.json()
+        data = client.execute(QUERY2, variables)
+        if data is None:
+            return "errors"
        
         if "errors" in data:
             error_descr = data["errors"][0]["type"]
@@ -171,19 +168,13 @@ def fetch_issues(owner, name, since):
                 "open_issues_count": open_issues_count,
                 "closed_issues_count": closed_issues_count}
 
-def fetch_stars(owner, name):
+def fetch_stars(client, owner, name):
     variables = {
         "owner": owner,
         "name": name,
     }
-    resp = requests.post(
-        GITHUB_API_URL,
-        json={"query": QUERY3, "variables": variables},
-        headers=HEADERS,
-    )
-    resp.raise_for_status()
-    data = resp.json()
-    if "errors" in data:
+    data = client.execute(QUERY3, variables)
+    if data is None or "errors" in data:
         return None
     stars = data["data"]["repository"]["stargazerCount"]
     return stars
@@ -193,7 +184,7 @@ def fetch_stars(owner, name):
 
 
 
-def main():
+def collect_results(client):
     with open("filtered_forks_15_commits.jsonl") as f:
         
         repos = f.readlines()
@@ -206,9 +197,19 @@ def main():
         parentOwner, parentName = repo['repo']['name'].split('/')
         forkTime = payload['updated_at']
         since = datetime.strptime(forkTime, '%Y-%m-%dT%H:%M:%SZ')
-        dates = fetch_commit_dates(childOwner, childName, since)
-        issuesData= fetch_issues(childOwner, childName, since)
-        stars = fetch_stars(childOwner, childName)
+        if MONTHLY_COUNTS:
+            commitTimes = monthly_commit_counts(client, childOwner, childName, since)
+            post2m      = commits_post_2m(client, childOwner, childName, since, commitTimes)
+            if post2m is None:
+                # Don't record a commitsPost2m counted from partial dates
+                print(f"Skipping {childOwner}/{childName}: commit dates for commitsPost2m failed")
+                continue
+        else:
+            dates       = fetch_commit_dates(client, childOwner, childName, since)
+            commitTimes = monthly_timeseries(dates)
+            post2m      = commitsPost2m(dates)
+        issuesData= fetch_issues(client, childOwner, childName, since)
+        stars = fetch_stars(client, childOwner, childName)
         
         results.append({
             'parentName': parentName,
@@ -216,15 +217,28 @@ def main():
                 'childOwner': childOwner,
                 'childName': childName,
             'forkTime': forkTime,
-            'commitTimes': monthly_timeseries(dates),
+            'commitTimes': commitTimes,
             'issues': issuesData,
-            'commitsPost2m': commitsPost2m(dates),
+            'commitsPost2m': post2m,
             'stars': stars
 
         })
-        
-    with open("huge_data_for_eda_cda.json", "w") as f:
-        json.dump(results, f, indent=2)
+    return results
+
+
+def main():
+    # One pooled client for every request (see github_client.py); answers we
+    # already have are reused on reruns (see response_cache.py)
+    cache  = ResponseCache()
+    client = GraphQLClient(GITHUB_TOKENS, GITHUB_API_URL, cache=cache)
+    try:
+        results = collect_results(client)
+        with open("huge_data_for_eda_cda.json", "w") as f:
+            json.dump(results, f, indent=2)
+        print(client.metrics.summary())
+        print(cache.summary())
+    finally:
+        client.close()
 
 
 if __name__ == "__main__":
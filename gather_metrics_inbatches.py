@@ -1,15 +1,20 @@
 import json
-import requests
 from datetime import datetime, timedelta
 from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 import time
 
+from github_client import GraphQLClient
+from monthly_commits import monthly_commit_counts, commits_post_2m
+from response_cache import ResponseCache
+
 GITHUB_API_URL = "https://api.github.com/graphql"
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}"
-}
+GITHUB_TOKENS  = [""]   # one or more personal access tokens; requests rotate across them
+
+# True: commitTimes from one query of per-month history totals per repo
+# (see monthly_commits.py). False: page through every commit since the fork.
+MONTHLY_COUNTS = True
 
 
 # fetches commit history from a repository’s default branch since a given timestamp
@@ -60,7 +65,7 @@ query($owner: String!, $name: String!) {
 }
 """
 
-def fetch_commit_dates(owner, name, since):
+def fetch_commit_dates(client, owner, name, since):
     cursor = None
     dates = []
     while True:
@@ -70,13 +75,10 @@ def fetch_commit_dates(owner, name, since):
             "since": since.isoformat() + "Z",
             "cursor": cursor
         }
-        resp = requests.post(
-            GITHUB_API_URL,
-            json={"query": QUERY, "variables": variables},
-            headers=HEADERS,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = client.execute(QUERY, variables)
+        if data is None:
+            print(f"Request failed for {owner}/{name}")
+            return None
 
         if "errors" in data:
             print("GraphQL error:", data["errors"])
@@ -136,7 +138,7 @@ def commitsPost2m(commit_dates):
     return total
 
 
-def fetch_issues(owner, name, since):
+def fetch_issues(client, owner, name, since):
     cursor = None
 
     while True:
@@ -147,14 +149,9 @@ def fetch_issues(owner, name, since):
             "cursor": cursor
         }
 
-        resp = requests.post(
-            GITHUB_API_URL,
-            json={"query": QUERY2, "variables": variables},
-            headers=HEADERS,
-        )
-
-        resp.raise_for_status()
-        data = resp.json()
+        data = client.execute(QUERY2, variables)
+        if data is None:
+            return "errors"
        
         if "errors" in data:
             error_descr = data["errors"][0]["type"]
@@ -173,19 +170,13 @@ def fetch_issues(owner, name, since):
                 "open_issues_count": open_issues_count,
                 "closed_issues_count": closed_issues_count}
 
-def fetch_stars(owner, name):
+def fetch_stars(client, owner, name):
     variables = {
         "owner": owner,
         "name": name,
     }
-    resp = requests.post(
-        GITHUB_API_URL,
-        json={"query": QUERY3, "variables": variables},
-        headers=HEADERS,
-    )
-    resp.raise_for_status()
-    data = resp.json()
-    if "errors" in data:
+    data = client.execute(QUERY3, variables)
+    if data is None or "errors" in data:
         return None
     stars = data["data"]["repository"]["stargazerCount"]
     return stars
@@ -203,30 +194,39 @@ def fetch_stars(owner, name):
 def main():
     batch_size = 100
 
-    with open("filtered_forks_15_commits.jsonl", "r", encoding="utf-8") as infile, \
-         open("result_final.json", "w", encoding="utf-8") as outfile:
+    # One pooled client for every request (see github_client.py); answers we
+    # already have are reused on reruns (see response_cache.py)
+    cache  = ResponseCache()
+    client = GraphQLClient(GITHUB_TOKENS, GITHUB_API_URL, cache=cache)
+    try:
+        with open("filtered_forks_15_commits.jsonl", "r", encoding="utf-8") as infile, \
+             open("result_final.json", "w", encoding="utf-8") as outfile:
 
-        outfile.write("[\n")
-        first_item = True
-        batch = []
+            outfile.write("[\n")
+            first_item = True
+            batch = []
 
-        for line in infile:
-            batch.append(line)
+            for line in infile:
+                batch.append(line)
 
-            if len(batch) == batch_size:
-                first_item = process_batch(batch, outfile, first_item)
-                batch = []
-                time.sleep(1)
+                if len(batch) == batch_size:
+                    first_item = process_batch(client, batch, outfile, first_item)
+                    batch = []
+                    time.sleep(1)
 
-        # Process remaining lines (if any)
-        if batch:
-            process_batch(batch, outfile, first_item)
+            # Process remaining lines (if any)
+            if batch:
+                process_batch(client, batch, outfile, first_item)
 
-        outfile.write("\n]")
+            outfile.write("\n]")
+        print(client.metrics.summary())
+        print(cache.summary())
+    finally:
+        client.close()
 
 
 
-def process_batch(batch, outfile, first_item):
+def process_batch(client, batch, outfile, first_item):
     for repo_str in batch:
         repo = json.loads(repo_str)
         
@@ -237,9 +237,19 @@ def process_batch(batch, outfile, first_item):
         parentOwner, parentName = repo['repo']['name'].split('/')
         forkTime = payload['updated_at']
         since = datetime.strptime(forkTime, '%Y-%m-%dT%H:%M:%SZ')
-        dates = fetch_commit_dates(childOwner, childName, since)
-        issuesData= fetch_issues(childOwner, childName, since)
-        stars = fetch_stars(childOwner, childName)
+        if MONTHLY_COUNTS:
+            commitTimes = monthly_commit_counts(client, childOwner, childName, since)
+            post2m      = commits_post_2m(client, childOwner, childName, since, commitTimes)
+            if post2m is None:
+                # Don't record a commitsPost2m counted from partial dates
+                print(f"Skipping {childOwner}/{childName}: commit dates for commitsPost2m failed")
+                continue
+        else:
+            dates       = fetch_commit_dates(client, childOwner, childName, since)
+            commitTimes = monthly_timeseries(dates)
+            post2m      = commitsPost2m(dates)
+        issuesData= fetch_issues(client, childOwner, childName, since)
+        stars = fetch_stars(client, childOwner, childName)
 
 
         result = {
@@ -248,9 +258,9 @@ def process_batch(batch, outfile, first_item):
                 "childOwner": childOwner,
                 "childName": childName,
             "forkTime": forkTime,
-            "commitTimes": monthly_timeseries(dates),
+            "commitTimes": commitTimes,
             "issues": issuesData,
-            "commitsPost2m": commitsPost2m(dates),
+            "commitsPost2m": post2m,
             "stars": stars
         }
 
@@ -0,0 +1,260 @@
+"""
+Local storage for GH Archive hourly files.
+
+HourCache     — optional on-disk cache of the raw .json.gz hours, stored by
+                SHA-256 of their content and capped at max_bytes with
+                least-recently-used eviction. Reruns read hours from disk
+                instead of data.gharchive.org.
+ExtractWriter — writes a compact per-hour .json.gz holding only the lines
+                for our tracked repos, for every hour in the scanned range
+                (also the ones no consumer needs this run). Pointing
+                ARCHIVE_URL at the extract directory replays those small
+                files instead of the archive, so changed metrics or windows
+                don't need a new download; hours missing from the extract
+                are reported before the replay starts.
+
+Both are plain directories, and any directory laid out like the archive
+(<YYYY-MM-DD-H>.json.gz files) can stand in for the archive server.
+
+Hours the server has no file for get a <filename>.nodata marker so they
+aren't asked for again, but only once they are NO_DATA_MIN_AGE old (a
+newer hour may just not be published yet). Cache markers also expire
+after NO_DATA_TTL, so an hour a misconfigured or flaky server reported as
+missing is retried. To retry such hours now, delete the markers:
+rm <CACHE_DIR>/hours/*.nodata, or rm <EXTRACT_DIR>/*.nodata and rerun the
+extracting scan, which fills in the hours the extract lacks.
+"""
+import gzip, hashlib, io, json, os, time, uuid
+from datetime import datetime, timedelta, timezone
+
+EXTRACT_MANIFEST = "extract_manifest.json"
+NO_DATA_SUFFIX   = ".nodata"
+NO_DATA_MIN_AGE  = timedelta(days=1)
+NO_DATA_TTL      = timedelta(days=7)
+
+
+def _atomic_write(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def no_data_is_final(filename):
+    """True if the hour ended more than NO_DATA_MIN_AGE ago, so a missing file won't appear later."""
+    year, month, day, hour = (int(part) for part in filename.replace(".json.gz", "").split("-"))
+    hour_end = datetime(year, month, day, hour, tzinfo=timezone.utc) + timedelta(hours=1)
+    return datetime.now(timezone.utc) - hour_end > NO_DATA_MIN_AGE
+
+
+def is_local_source(source):
+    return not source.startswith(("http://", "https://"))
+
+
+def local_hour_path(directory, filename):
+    """
+    Path of one hour in a local archive stand-in or an extract directory.
+    Returns None if the hour has no data. For extracts, an hour that was
+    never extracted is an error rather than silently empty.
+    """
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        return path
+    if os.path.exists(os.path.join(directory, EXTRACT_MANIFEST)) and \
+            not os.path.exists(path + NO_DATA_SUFFIX):
+        raise FileNotFoundError(f"{filename} is not in extract directory {directory}")
+    return None
+
+
+def read_local_hour(directory, filename):
+    """The bytes of one local hour (see local_hour_path), or None if it has no data."""
+    path = local_hour_path(directory, filename)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def check_extract_hours(directory, filenames):
+    """Make sure an extract directory has every one of these hours (data or a no-data marker)."""
+    if not os.path.exists(os.path.join(directory, EXTRACT_MANIFEST)):
+        return
+    missing = [fn for fn in filenames
+               if not os.path.exists(os.path.join(directory, fn))
+               and not os.path.exists(os.path.join(directory, fn + NO_DATA_SUFFIX))]
+    if missing:
+        raise ValueError(f"Extract {directory} is missing {len(missing)} of the {len(filenames)} hours "
+                         f"to scan (e.g. {missing[0]}). Re-extract from the archive for this date range.")
+
+
+def check_extract_covers(directory, consumers):
+    """Make sure an extract directory was built for (at least) these consumers' repos."""
+    manifest_path = os.path.join(directory, EXTRACT_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return
+    with open(manifest_path) as f:
+        extracted = set(json.load(f)["repos"])
+    for c in consumers:
+        missing = c.repo_set - extracted
+        if missing:
+            raise ValueError(f"Extract {directory} has no events for {len(missing)} of "
+                             f"{c.name}'s repos (e.g. {sorted(missing)[0]}). Re-extract from the archive.")
+
+
+# ---------------------------------------------------------------
+# RAW HOUR CACHE
+# objects/ab/<sha256>.json.gz   content, mtime = last use
+# hours/<filename>.sha256       which object holds that hour
+# hours/<filename>.nodata       the server had no file for that hour
+#
+# The cache size is a running total, so objects/ is only walked when
+# it goes over max_bytes. Eviction then goes down to EVICT_TO of the
+# cap, leaving room for the next puts. Each parse process keeps its
+# own total (refreshed on every walk), so with PARSE_PROCESSES > 1
+# the cache can briefly run over the cap by about one margin each.
+# ---------------------------------------------------------------
+EVICT_TO = 0.9
+
+class HourCache:
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir   = cache_dir
+        self.max_bytes   = max_bytes
+        self.total_bytes = None   # see _size()
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "hours"), exist_ok=True)
+
+    def _pointer(self, filename):
+        return os.path.join(self.cache_dir, "hours", filename + ".sha256")
+
+    def _object(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest + ".json.gz")
+
+    def _no_data_marker(self, filename):
+        return os.path.join(self.cache_dir, "hours", filename + NO_DATA_SUFFIX)
+
+    def has_no_data(self, filename):
+        marker = self._no_data_marker(filename)
+        try:
+            age = time.time() - os.path.getmtime(marker)
+        except FileNotFoundError:
+            return False
+        if age > NO_DATA_TTL.total_seconds():
+            # Expired: ask the server again
+            try:
+                os.remove(marker)
+            except FileNotFoundError:
+                pass
+            return False
+        return True
+
+    def mark_no_data(self, filename):
+        if no_data_is_final(filename):
+            _atomic_write(self._no_data_marker(filename), b"")
+
+    def get(self, filename):
+        pointer = self._pointer(filename)
+        try:
+            with open(pointer) as f:
+                digest = f.read().strip()
+            path = self._object(digest)
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+
+        # A truncated or evicted-and-rewritten object is just a miss
+        if hashlib.sha256(content).hexdigest() != digest:
+            for p in (path, pointer):
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+            self.total_bytes = None   # walk again on the next put
+            return None
+
+        os.utime(path)  # mark as recently used
+        return content
+
+    def put(self, filename, content):
+        digest = hashlib.sha256(content).hexdigest()
+        path   = self._object(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            self._size()
+            _atomic_write(path, content)
+            self.total_bytes += len(content)
+        _atomic_write(self._pointer(filename), digest.encode())
+        if self._size() > self.max_bytes:
+            self.evict()
+
+    def _objects(self):
+        """(mtime, size, path) of every cached object."""
+        for root, _, files in os.walk(os.path.join(self.cache_dir, "objects")):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                yield st.st_mtime, st.st_size, os.path.join(root, name)
+
+    def _size(self):
+        """Running total of the objects' sizes, walked once and then kept up to date by put/evict."""
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self._objects())
+        return self.total_bytes
+
+    def evict(self):
+        """Delete least-recently-used objects until the cache fits in EVICT_TO of max_bytes."""
+        objects = sorted(self._objects())
+        total   = sum(size for _, size, _ in objects)
+        # Never evict the newest object, even if it alone exceeds the cap
+        for _, size, path in objects[:-1]:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self.total_bytes = total
+
+
+# ---------------------------------------------------------------
+# TRACKED-REPO EXTRACTS
+# ---------------------------------------------------------------
+class ExtractWriter:
+    def __init__(self, extract_dir, repo_names):
+        self.extract_dir = extract_dir
+        os.makedirs(extract_dir, exist_ok=True)
+
+        repos = sorted(repo_names)
+        manifest_path = os.path.join(extract_dir, EXTRACT_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f)["repos"] != repos:
+                    raise ValueError(f"{extract_dir} was extracted for a different repo set; "
+                                     f"use a new EXTRACT_DIR.")
+        else:
+            _atomic_write(manifest_path, json.dumps({"repos": repos}).encode())
+
+    def has(self, filename):
+        path = os.path.join(self.extract_dir, filename)
+        return os.path.exists(path) or os.path.exists(path + NO_DATA_SUFFIX)
+
+    def write(self, filename, lines):
+        """Save the kept raw lines of one hour (None = the hour has no data)."""
+        path = os.path.join(self.extract_dir, filename)
+        if lines is None:
+            # A recent hour is left out, so the next extracting run asks again
+            if no_data_is_final(filename):
+                _atomic_write(path + NO_DATA_SUFFIX, b"")
+            return
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz:
+            for line in lines:
+                gz.write(line if line.endswith(b"\n") else line + b"\n")
+        _atomic_write(path, buf.getvalue())
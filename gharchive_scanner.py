@@ -0,0 +1,627 @@
+"""
+Single-pass GH Archive scanner.
+Streams every hourly file exactly once and hands each event to every
+registered consumer whose repo set and time window match.
+
+Consumers are the step2 early-period metrics (forks and non-forks) and the
+sustainability-window PushEvent detection. Each consumer keeps its own
+progress file, so an hour is only downloaded if at least one consumer
+still needs it, and the standalone scripts can resume from a single-pass run.
+
+Each consumer accumulates into a mergeable state object. With
+PARSE_PROCESSES > 1, hours are downloaded and parsed in a process pool
+and the per-hour partial states are merged back in archive order.
+
+Hours are gunzipped as a stream (isal / zlib-ng if installed) and can
+also be read through a local cache, saved as small tracked-repo
+extracts, or replayed from a local directory (see gharchive_cache.py).
+"""
+import requests, json, os, re, time, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import pandas as pd
+
+from gharchive_cache import (HourCache, ExtractWriter, is_local_source, local_hour_path,
+                             read_local_hour, check_extract_covers, check_extract_hours)
+
+# Faster drop-in zlib implementations, if installed (pip install isal / zlib-ng)
+try:
+    from isal import isal_zlib as _zlib
+except ImportError:
+    try:
+        from zlib_ng import zlib_ng as _zlib
+    except ImportError:
+        import zlib as _zlib
+
+# Archive server, or a local directory laid out the same way
+# (a stand-in for testing, or an EXTRACT_DIR from an earlier run)
+ARCHIVE_URL = "https://data.gharchive.org"
+
+# ---------------------------------------------------------------
+# LOCAL CACHE / EXTRACTS — both off by default
+# CACHE_DIR keeps the raw hours so reruns don't download them again
+# (LRU-evicted above CACHE_MAX_BYTES). EXTRACT_DIR saves only the
+# lines for tracked repos; set ARCHIVE_URL to it to replay them.
+# ---------------------------------------------------------------
+CACHE_DIR       = None            # e.g. "gharchive_cache"
+CACHE_MAX_BYTES = 200 * 1024**3   # 200GB ≈ 2,000 hours
+EXTRACT_DIR     = None            # e.g. "gharchive_extract"
+
+# ---------------------------------------------------------------
+# DOWNLOAD / PARSE PIPELINE
+# Hours are downloaded by a small thread pool while the main thread
+# parses. At most PREFETCH_HOURS compressed files (~100MB each at peak
+# hours) are queued or held at once, so memory stays capped.
+#
+# With PARSE_PROCESSES > 1 each worker process downloads and parses
+# whole hours itself and only sends back small partial states, so
+# JSON decoding is spread over all cores. Scripts using the process
+# pool keep their work under `if __name__ == "__main__":` (needed
+# for the spawn start method on macOS).
+# ---------------------------------------------------------------
+DOWNLOAD_WORKERS = 4
+PREFETCH_HOURS   = 6
+PARSE_PROCESSES  = max(1, (os.cpu_count() or 1) - 1)
+
+# ---------------------------------------------------------------
+# STREAMING DECODE
+# Hours are gunzipped incrementally: compressed input goes in at most
+# READ_CHUNK_BYTES at a time and comes out in blocks of at most
+# DECODE_BLOCK_BYTES, which are split into lines. Worker processes
+# decode the HTTP body as it arrives instead of holding the whole
+# file first, so memory per hour stays flat. (The single-process path
+# still downloads whole hours ahead in threads, PREFETCH_HOURS above,
+# so a dropped connection never leaves a half-parsed hour behind.)
+# ---------------------------------------------------------------
+READ_CHUNK_BYTES   = 256 * 1024
+DECODE_BLOCK_BYTES = 4 * 1024 * 1024
+
+# ---------------------------------------------------------------
+# HELPERS
+# ---------------------------------------------------------------
+def load_repo_lookup(csv_file):
+    """repo_name -> created_at (UTC) for every repo in a step table."""
+    df = pd.read_csv(csv_file, parse_dates=["created_at"])
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    return dict(zip(df["repo_name"], df["created_at"]))
+
+# ---------------------------------------------------------------
+# TIMESTAMPS
+# Event timestamps are always "YYYY-MM-DDTHH:MM:SSZ", and all events of
+# an hourly file share their "YYYY-MM-DDTHH" prefix. The prefix is
+# parsed once (cached) and minutes / seconds are added as ints, which
+# is several times faster than strptime per event. Anything else goes
+# through strptime, so the results are the same.
+# ---------------------------------------------------------------
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+@lru_cache(maxsize=65536)
+def _hour_epoch(prefix):
+    return int(datetime.strptime(prefix, "%Y-%m-%dT%H").replace(tzinfo=timezone.utc).timestamp())
+
+def parse_timestamp(value):
+    """Epoch seconds (int) of a GH Archive timestamp, or None if it isn't one."""
+    try:
+        if len(value) == 20 and value[13] == ":" and value[16] == ":" and value[19] == "Z" \
+                and value[14:16].isdigit() and value[17:19].isdigit():
+            minutes, seconds = int(value[14:16]), int(value[17:19])
+            if minutes < 60 and seconds < 60:
+                return _hour_epoch(value[:13]) + minutes * 60 + seconds
+        return int(datetime.strptime(value, TIME_FORMAT).replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+def hourly_files(start_date, end_date):
+    """Yield (filename, hour_start) for every hour of every day from start_date to end_date."""
+    current = start_date
+    while current <= end_date:
+        for hour in range(24):
+            yield f"{current.strftime('%Y-%m-%d')}-{hour}.json.gz", current.replace(hour=hour)
+        current += timedelta(days=1)
+
+def load_progress(progress_file):
+    if progress_file and os.path.exists(progress_file):
+        with open(progress_file) as f:
+            return set(f.read().splitlines())
+    return set()
+
+_local = threading.local()
+
+def _session():
+    # One pooled keep-alive session per download thread / process
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+def fetch_hour(filename, source=None):
+    """Download one hourly file. Returns the gzip bytes, or None if the hour has no data."""
+    source = source or ARCHIVE_URL
+    if is_local_source(source):
+        return read_local_hour(source, filename)
+    r = _session().get(f"{source}/{filename}", timeout=60)
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.content
+
+
+def stream_hour(filename, source=None):
+    """
+    Like fetch_hour, but returns an iterator over the gzip bytes as they
+    are received (or None if the hour has no data).
+    """
+    source = source or ARCHIVE_URL
+    if is_local_source(source):
+        path = local_hour_path(source, filename)
+        return None if path is None else _file_chunks(path)
+    r = _session().get(f"{source}/{filename}", timeout=60, stream=True)
+    if r.status_code == 404:
+        r.close()
+        return None
+    r.raise_for_status()
+    return _response_chunks(r)
+
+def _file_chunks(path):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+def _response_chunks(r):
+    with r:
+        yield from r.iter_content(READ_CHUNK_BYTES)
+
+
+class HourSource:
+    """Where hours come from: ARCHIVE_URL (or a local directory), optionally through a HourCache."""
+    def __init__(self, source=None, cache_dir=None, cache_max_bytes=None):
+        self.source = source or ARCHIVE_URL
+        self.cache  = None
+        if cache_dir and not is_local_source(self.source):
+            self.cache = HourCache(cache_dir, cache_max_bytes or CACHE_MAX_BYTES)
+
+    def fetch(self, filename):
+        if self.cache is None:
+            return fetch_hour(filename, self.source)
+
+        if self.cache.has_no_data(filename):
+            return None
+        content = self.cache.get(filename)
+        if content is not None:
+            return content
+        content = fetch_hour(filename, self.source)
+        if content is None:
+            self.cache.mark_no_data(filename)
+        else:
+            self.cache.put(filename, content)
+        return content
+
+    def stream(self, filename):
+        """Like fetch, as an iterator over the gzip bytes; hours go through the cache whole."""
+        if self.cache is None:
+            return stream_hour(filename, self.source)
+        content = self.fetch(filename)
+        return None if content is None else _byte_chunks(content)
+
+    def describe(self):
+        if self.cache is None:
+            return self.source
+        return f"{self.source} (cached in {self.cache.cache_dir})"
+
+def run_ahead(pool, fn, jobs, max_in_flight):
+    """
+    Submit fn(job) to pool for each job, keeping at most max_in_flight
+    outstanding, and yield (job, result, error) strictly in input order.
+    """
+    window = deque()
+    for job in jobs:
+        window.append((job, pool.submit(fn, job)))
+        if len(window) >= max_in_flight:
+            yield _collect(*window.popleft())
+    while window:
+        yield _collect(*window.popleft())
+
+def _collect(job, future):
+    try:
+        return job, future.result(), None
+    except Exception as e:
+        return job, None, e
+
+def prefetch_hours(jobs, hour_source, workers=DOWNLOAD_WORKERS, max_in_flight=PREFETCH_HOURS):
+    """
+    Download jobs (tuples whose first item is the filename) in the background
+    and yield (job, content, error) strictly in input order.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from run_ahead(pool, lambda job: hour_source.fetch(job[0]), jobs, max_in_flight)
+
+# ---------------------------------------------------------------
+# LINE PRE-FILTER
+# More than 99.9% of archive events are for repos we don't track, so
+# the repo name (and event type) are pulled out of the raw bytes first
+# and only matching lines get a full json.loads. The repo object has
+# no nested braces, so one regex finds its "name" wherever it sits.
+# Lines the regex can't read (or names with JSON escapes) are decoded
+# anyway, so nothing is lost.
+# ---------------------------------------------------------------
+_REPO_NAME  = re.compile(rb'"repo":\{[^{}]*?"name":"([^"]*)"')
+_EVENT_TYPE = re.compile(rb'"type":"([^"]*)"')
+
+
+class LineFilter:
+    def __init__(self, consumers):
+        self.repo_names = set()
+        for c in consumers:
+            self.repo_names.update(name.encode() for name in c.repo_set)
+
+        # Only filter on type if every consumer restricts it (e.g. PushEvent for sustainability)
+        if all(c.event_types is not None for c in consumers):
+            types = set().union(*(c.event_types for c in consumers))
+            self.type_markers = [f'"type":"{t}"'.encode() for t in sorted(types)]
+        else:
+            self.type_markers = None
+
+    def __call__(self, line):
+        return self.tracked(line) and self.type_ok(line)
+
+    def tracked(self, line):
+        m = _REPO_NAME.search(line)
+        if m is None or line.find(b'"payload":', 0, m.start()) != -1:
+            # Unfamiliar layout (no top-level repo before the payload) —
+            # decode it and let the consumers decide
+            return True
+        name = m.group(1)
+        return b"\\" in name or name in self.repo_names
+
+    def type_ok(self, line):
+        if self.type_markers is None:
+            return True
+        if any(marker in line for marker in self.type_markers):
+            return True
+        # Only drop compact lines whose type is readable and not wanted;
+        # other layouts (e.g. "type": "PushEvent") are decoded
+        m = _EVENT_TYPE.search(line)
+        return m is None or b"\\" in m.group(1)
+
+
+def _byte_chunks(content):
+    """A bytes object as READ_CHUNK_BYTES slices (no copies)."""
+    view = memoryview(content)
+    return (view[i:i + READ_CHUNK_BYTES] for i in range(0, len(view), READ_CHUNK_BYTES))
+
+def gunzip_blocks(chunks):
+    """
+    Decompressed blocks of a gzip stream given as an iterable of byte chunks.
+    Handles multi-member files; raises EOFError if the stream is cut short.
+    """
+    d    = _zlib.decompressobj(31)
+    seen = False
+    for chunk in chunks:
+        while chunk:
+            seen  = True
+            block = d.decompress(chunk, DECODE_BLOCK_BYTES)
+            if block:
+                yield block
+            if d.eof:
+                # Next gzip member, if any
+                chunk = d.unused_data
+                d     = _zlib.decompressobj(31)
+                seen  = False
+            else:
+                chunk = d.unconsumed_tail
+    # Output still held back by the block size limit
+    while seen and not d.eof:
+        block = d.decompress(b"", DECODE_BLOCK_BYTES)
+        if not block:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        yield block
+
+def gunzip_lines(chunks):
+    """The lines (without b"\\n") of a gzip stream given as an iterable of byte chunks."""
+    tail = b""
+    for block in gunzip_blocks(chunks):
+        lines    = block.split(b"\n")
+        lines[0] = tail + lines[0]
+        tail     = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+def iter_events(content, line_filter=None, kept=None):
+    """
+    Decode the events of one hour that pass line_filter. content is the gzip
+    bytes or an iterator over them (see stream_hour). If kept is a list, the
+    raw lines for tracked repos (any event type) are appended to it.
+    """
+    chunks = _byte_chunks(content) if isinstance(content, (bytes, bytearray)) else content
+    for line in gunzip_lines(chunks):
+        if line_filter is not None:
+            if not line_filter.tracked(line):
+                continue
+            if kept is not None:
+                kept.append(line)
+            if not line_filter.type_ok(line):
+                continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+def tracked_lines(content, line_filter):
+    """The raw lines of one hour for tracked repos, without decoding them."""
+    chunks = _byte_chunks(content) if isinstance(content, (bytes, bytearray)) else content
+    return [line for line in gunzip_lines(chunks) if line_filter.tracked(line)]
+
+def dispatch_events(content, consumers, states, line_filter=None, kept=None):
+    """Parse one hour and feed each event to the consumers that want it."""
+    if not consumers:
+        # Hour only read for the extract
+        if kept is not None:
+            kept.extend(tracked_lines(content, line_filter))
+        return
+    for event in iter_events(content, line_filter, kept):
+        repo_name  = event.get("repo", {}).get("name")
+        event_type = event.get("type")
+        for c, state in zip(consumers, states):
+            if c.wants(repo_name, event_type):
+                c.process_event(event, state)
+
+# ---------------------------------------------------------------
+# PROCESS POOL WORKERS
+# Consumers are shipped to each worker once; every task then parses
+# one hour into fresh states and returns them for merging.
+# ---------------------------------------------------------------
+_worker_consumers = None
+_worker_filter    = None
+_worker_source    = None
+_worker_extract   = None
+
+def _init_worker(consumers, hour_source, extract):
+    global _worker_consumers, _worker_filter, _worker_source, _worker_extract
+    _worker_consumers = consumers
+    _worker_filter    = LineFilter(consumers)
+    _worker_source    = hour_source
+    _worker_extract   = extract
+
+def _parse_hour(job):
+    filename, indices = job
+    chunks = _worker_source.stream(filename)
+    if chunks is None:
+        if _worker_extract is not None:
+            _worker_extract.write(filename, None)
+        return None
+    size = 0
+    def counted():
+        nonlocal size
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    # Decoded as the bytes arrive; a failed download discards these fresh states
+    consumers = [_worker_consumers[i] for i in indices]
+    states    = [c.new_state() for c in consumers]
+    kept      = [] if _worker_extract is not None else None
+    dispatch_events(counted(), consumers, states, _worker_filter, kept)
+    if _worker_extract is not None:
+        _worker_extract.write(filename, kept)
+    return states, size
+
+# ---------------------------------------------------------------
+# CONSUMER BASE CLASS
+# ---------------------------------------------------------------
+class Consumer:
+    """
+    One analysis that wants events for a set of repos over a range of days.
+    Subclasses implement new_state(), process_event(event, state) and
+    summary(). States must support merge(other) so that partial states
+    from worker processes can be folded into self.state in archive order.
+    finish() is called once the scan is over.
+
+    needs() is asked again right before each hour is downloaded, so a
+    consumer can drop hours it no longer needs as its state fills in
+    (see SustainabilityConsumer).
+    """
+    event_types = None  # None = every event type
+
+    def __init__(self, name, repo_lookup, start_date, end_date, progress_file=None):
+        self.name          = name
+        self.repo_lookup   = repo_lookup
+        self.repo_set      = set(repo_lookup.keys())
+        self.start_date    = start_date
+        self.end_date      = end_date
+        self.progress_file = progress_file
+        self.done_files    = load_progress(progress_file)
+        self.state         = self.new_state()
+        if self.done_files:
+            print(f"[{name}] Resuming — {len(self.done_files)} files already processed.")
+
+    def covers(self, hour_start):
+        return self.start_date <= hour_start < self.end_date + timedelta(days=1)
+
+    def needs(self, filename, hour_start):
+        return self.covers(hour_start) and filename not in self.done_files
+
+    def wants(self, repo_name, event_type):
+        return repo_name in self.repo_set and (
+            self.event_types is None or event_type in self.event_types
+        )
+
+    def mark_done(self, filename):
+        self.done_files.add(filename)
+        if self.progress_file:
+            with open(self.progress_file, "a") as pf:
+                pf.write(filename + "\n")
+
+    def new_state(self):
+        raise NotImplementedError
+
+    def process_event(self, event, state):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def summary(self):
+        return ""
+
+# ---------------------------------------------------------------
+# SCANNER
+# ---------------------------------------------------------------
+class ArchiveScanner:
+    def __init__(self, consumers, report_every=50, workers=DOWNLOAD_WORKERS,
+                 prefetch=PREFETCH_HOURS, processes=PARSE_PROCESSES,
+                 source=None, cache_dir=None, extract_dir=None):
+        self.consumers    = list(consumers)
+        self.report_every = report_every
+        self.workers      = workers
+        self.prefetch     = max(prefetch, 1)
+        self.processes    = max(processes, 1)
+        self.hour_source  = HourSource(source, cache_dir or CACHE_DIR)
+        self.extract      = None
+        self.skipped      = 0   # planned hours no consumer needed any more
+        self.downloaded   = 0   # hours / bytes actually parsed
+        self.bytes_read   = 0
+        extract_dir       = extract_dir or EXTRACT_DIR
+        if extract_dir:
+            self.extract = ExtractWriter(extract_dir, set().union(*(c.repo_set for c in self.consumers)))
+
+    def _extract_only(self, filename):
+        """Hours no consumer needs are still read once for the extract, so it covers the whole range."""
+        return self.extract is not None and not self.extract.has(filename)
+
+    def _live_hours(self, todo):
+        """
+        (filename, live) for each planned hour, with live worked out when the
+        hour is about to be downloaded rather than up front. Hours no consumer
+        needs any more are skipped, unless they still go into the extract
+        (live is then empty).
+        """
+        for filename, hour_start in todo:
+            live = [c for c in self.consumers if c.needs(filename, hour_start)]
+            if live or self._extract_only(filename):
+                yield filename, live
+            else:
+                self.skipped += 1
+
+    def _hour_results(self, todo):
+        """
+        Yield ((filename, live), ok, error) per hour in archive order, after
+        the hour's events have been folded into each live consumer's state.
+        ok is False for hours with no data.
+        """
+        hours = self._live_hours(todo)
+        if self.processes == 1:
+            # Parse in this process into fresh states, merged once the whole
+            # hour is parsed, so an hour that fails halfway leaves nothing behind
+            line_filter = LineFilter(self.consumers)
+            for job, content, error in prefetch_hours(hours, self.hour_source, self.workers, self.prefetch):
+                if error is None:
+                    live = job[1]
+                    if content is not None:
+                        self.downloaded += 1
+                        self.bytes_read += len(content)
+                    kept = [] if self.extract is not None and content is not None else None
+                    try:
+                        if content is not None:
+                            states = [c.new_state() for c in live]
+                            dispatch_events(content, live, states, line_filter, kept)
+                        if self.extract is not None:
+                            self.extract.write(job[0], kept)
+                        if content is not None:
+                            for c, state in zip(live, states):
+                                c.state.merge(state)
+                    except Exception as e:
+                        error = e
+                yield job, content is not None, error
+            return
+
+        jobs = ((fn, [self.consumers.index(c) for c in live]) for fn, live in hours)
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.consumers, self.hour_source, self.extract)) as pool:
+            results = run_ahead(pool, _parse_hour, jobs, max(self.prefetch, self.processes))
+            for (filename, indices), result, error in results:
+                live = [self.consumers[i] for i in indices]
+                if result is not None:
+                    partials, size = result
+                    self.downloaded += 1
+                    self.bytes_read += size
+                    for c, partial in zip(live, partials):
+                        c.state.merge(partial)
+                yield (filename, live), result is not None, error
+
+    def run(self):
+        start_date = min(c.start_date for c in self.consumers)
+        end_date   = max(c.end_date   for c in self.consumers)
+
+        # Work out up front which hours some consumer still needs; which
+        # consumers get each hour is decided again right before it is
+        # downloaded (_live_hours)
+        total_hours = 0
+        already     = 0
+        todo        = []
+        for filename, hour_start in hourly_files(start_date, end_date):
+            covering = [c for c in self.consumers if c.covers(hour_start)]
+            if not covering:
+                continue
+            total_hours += 1
+            if any(c.needs(filename, hour_start) for c in covering) or self._extract_only(filename):
+                todo.append((filename, hour_start))
+            elif all(filename in c.done_files for c in covering):
+                already += 1
+            else:
+                self.skipped += 1
+
+        # Replaying an extract: fail now rather than on the first missing hour
+        if is_local_source(self.hour_source.source):
+            check_extract_covers(self.hour_source.source, self.consumers)
+            check_extract_hours(self.hour_source.source, [filename for filename, _ in todo])
+
+        processed = already
+        errors    = 0
+
+        print(f"\nScanning {total_hours} hourly files from {start_date.date()} to {end_date.date()} "
+              f"for {len(self.consumers)} consumers: {', '.join(c.name for c in self.consumers)}")
+        print(f"  {processed} already done, {self.skipped} not needed, {len(todo)} to download "
+              f"({self.processes} parse processes, {self.workers} download threads, "
+              f"up to {self.prefetch} hours in flight)")
+        print(f"  Source: {self.hour_source.describe()}"
+              + (f" | extracting tracked events to {self.extract.extract_dir}" if self.extract else ""))
+
+        for (filename, live), ok, error in self._hour_results(todo):
+            try:
+                if error is not None:
+                    raise error
+                if not ok:
+                    # Some hours have no data
+                    processed += 1
+                    continue
+
+                # Mark as done only once the hour is fully parsed, in archive order
+                for c in live:
+                    c.mark_done(filename)
+
+                processed += 1
+                if processed % self.report_every == 0:
+                    pct = (processed + self.skipped) / total_hours * 100
+                    details = " | ".join(f"{c.name}: {c.summary()}" for c in self.consumers)
+                    print(f"  Progress: {processed}/{total_hours} files ({pct:.1f}%) | {details}")
+
+            except Exception as e:
+                errors += 1
+                if errors <= 10:
+                    print(f"  Error on {filename}: {e}")
+                time.sleep(2)
+
+        for c in self.consumers:
+            c.finish()
+
+        print(f"\nDone scanning! {processed} files, {errors} errors.")
+        if self.skipped:
+            # Skipped hours are estimated at the average size of the ones downloaded
+            avg_bytes = self.bytes_read / self.downloaded if self.downloaded else 0
+            print(f"  Skipped {self.skipped} hours no consumer needed "
+                  f"(~{self.skipped * avg_bytes / 1024**3:.1f} GB not downloaded)")
+        return processed, errors
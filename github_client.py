@@ -0,0 +1,454 @@
+"""
+GitHub GraphQL client shared by every collector.
+
+Requests share one pooled aiohttp session. Each personal access token
+has a RateLimitBudget: a token bucket over GitHub's GraphQL points,
+refilled from the rateLimit { remaining resetAt } each query asks for
+(or the X-RateLimit-* headers). Every request goes to the token with
+the most points left, and as many are kept in flight as the budgets
+allow, up to MAX_IN_FLIGHT per token; when a token runs low it pauses
+until its resetAt, instead of sleeping a fixed time after every repo.
+
+AsyncGraphQLClient is the async entry point, GraphQLClient the blocking
+one (it runs the async client on a background thread). Both count
+requests, retries, points spent and latency in client.metrics.
+
+query_repos() packs many repositories into one request with aliases
+(r0: repository(...), r1: ...), sized by the rateLimit cost of earlier
+batches. Repos that error inside a batch are retried on their own.
+
+Retry behaviour is the same as the old per-script run_graphql():
+403/429 wait for the reset (min 60s), 502 backs off 10s/20s/..., timeouts
+and connection errors retry, and NOT_FOUND / FORBIDDEN answers are None.
+"""
+import asyncio, json, math, threading, time
+from collections import Counter
+from datetime import datetime
+import aiohttp
+
+from response_cache import cacheable
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# ---------------------------------------------------------------
+# RATE LIMIT BUDGET
+# GitHub GraphQL allows 5000 points/hour; a single-repo query costs 1.
+# GitHub also asks clients not to run many concurrent requests, so
+# MAX_IN_FLIGHT stays small even when there are points to spare.
+# ---------------------------------------------------------------
+POINTS_PER_HOUR = 5000
+RESERVE_POINTS  = 50      # pause until the reset below this
+MAX_IN_FLIGHT   = 8
+MAX_ATTEMPTS    = 5
+REQUEST_TIMEOUT = 30
+
+
+def parse_reset_at(reset_at):
+    """rateLimit.resetAt (ISO 8601) -> epoch seconds."""
+    return datetime.fromisoformat(reset_at.replace("Z", "+00:00")).timestamp()
+
+
+class RateLimitBudget:
+    """
+    Token bucket of GraphQL points. acquire() reserves the expected cost
+    of a request and waits while that would dip below the reserve;
+    release() returns the reservation with what GitHub reported back.
+    """
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, reserve=RESERVE_POINTS):
+        self.remaining    = POINTS_PER_HOUR
+        self.reset_at     = None   # epoch seconds
+        self.reserve      = reserve
+        self.reserved     = 0      # points held by requests in flight
+        self.paused_until = 0.0
+        self._slots       = asyncio.Semaphore(max_in_flight)
+        self._changed     = asyncio.Condition()
+
+    def _wait_time(self, cost):
+        """Seconds to wait before spending cost points (0 = until a response comes back), or None."""
+        now = time.time()
+        if self.paused_until > now:
+            return self.paused_until - now
+        if self.remaining - self.reserved - cost >= self.reserve:
+            return None
+        if self.reserved:
+            return 0
+        wait = max(int(self.reset_at - now), 10) if self.reset_at else 60
+        print(f"\n⏳ Rate limit low ({self.remaining} remaining). Pausing {wait}s...")
+        self.paused_until = now + wait
+        return wait
+
+    async def acquire(self, cost=1):
+        await self._slots.acquire()
+        async with self._changed:
+            while True:
+                wait = self._wait_time(cost)
+                if wait is None:
+                    self.reserved += cost
+                    return
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=wait or None)
+                except asyncio.TimeoutError:
+                    # Waited out the reset — start from a full estimate again
+                    if self.remaining - self.reserved - cost < self.reserve:
+                        self.remaining = POINTS_PER_HOUR
+
+    async def release(self, cost=1, remaining=None, reset_at=None):
+        async with self._changed:
+            self.reserved -= cost
+            self.update(remaining, reset_at)
+            self._changed.notify_all()
+        self._slots.release()
+
+    def update(self, remaining=None, reset_at=None):
+        if remaining is None:
+            return
+        if reset_at is not None and (self.reset_at is None or reset_at > self.reset_at + 1):
+            # New rate limit window
+            self.reset_at  = reset_at
+            self.remaining = remaining
+        else:
+            # Responses can arrive out of order — keep the lowest count of this window
+            self.remaining = min(self.remaining, remaining)
+
+    async def pause(self, seconds):
+        async with self._changed:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self._changed.notify_all()
+
+
+# ---------------------------------------------------------------
+# ALIASED MULTI-REPO QUERIES
+# Many repos go into one request as r0: repository(...) { ... },
+# r1: ... GitHub answers the ones it can and lists the rest in
+# errors[] with the alias as the first element of their path.
+# The batch size adapts to the rateLimit cost reported back.
+# ---------------------------------------------------------------
+BATCH_SIZE_START = 20
+BATCH_SIZE_MAX   = 50
+BATCH_MAX_COST   = 10    # points per request to stay under
+BATCH_ATTEMPTS   = 2     # then the repos are retried one by one
+
+
+def build_repo_query(aliases):
+    """aliases: list of (alias, owner, name, fields), with owner/name inlined as literals."""
+    lines = ["query {", "  rateLimit { cost remaining resetAt }"]
+    for alias, owner, name, fields in aliases:
+        lines.append(f"  {alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{")
+        lines.append(fields.rstrip())
+        lines.append("  }")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def alias_errors(body):
+    """alias -> error type, for the errors that belong to one alias."""
+    errors = {}
+    for err in body.get("errors") or []:
+        path = err.get("path") or []
+        if path:
+            errors.setdefault(path[0], err.get("type", ""))
+    return errors
+
+
+class BatchSizer:
+    """How many repos to put in the next aliased query, from the cost of the last ones."""
+    def __init__(self, size=BATCH_SIZE_START, maximum=BATCH_SIZE_MAX, max_cost=BATCH_MAX_COST):
+        self.size          = size
+        self.maximum       = maximum
+        self.max_cost      = max_cost
+        self.cost_per_repo = None
+
+    def expected_cost(self, n_repos):
+        if self.cost_per_repo is None:
+            return 1
+        return max(1, math.ceil(n_repos * self.cost_per_repo))
+
+    def observe(self, n_repos, cost):
+        self.cost_per_repo = max(cost, 1) / n_repos
+        self.size = max(1, min(self.maximum, int(self.max_cost / self.cost_per_repo)))
+
+    def failed(self, n_repos):
+        # Big batches are the likeliest to time out on GitHub's side
+        self.size = max(1, n_repos // 2)
+
+
+# ---------------------------------------------------------------
+# METRICS
+# ---------------------------------------------------------------
+class ClientMetrics:
+    """Requests, retries, failures, GraphQL points spent and latency of one client."""
+    def __init__(self):
+        self.requests  = 0
+        self.retries   = 0
+        self.failures  = 0     # calls that gave up after every attempt
+        self.points    = 0
+        self.latencies = []    # seconds, one per request
+        self.statuses  = Counter()
+
+    def record(self, seconds, status, points=0):
+        self.requests += 1
+        self.latencies.append(seconds)
+        self.statuses[status] += 1
+        self.points += points
+
+    def summary(self):
+        if not self.latencies:
+            return "GitHub API: no requests"
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        statuses = ", ".join(f"{status}: {n}" for status, n in sorted(self.statuses.items(), key=str))
+        return (f"GitHub API: {self.requests} requests ({statuses}), {self.retries} retries, "
+                f"{self.failures} failed, {self.points} points | latency p50 {p50:.2f}s, p95 {p95:.2f}s")
+
+
+# ---------------------------------------------------------------
+# CLIENT
+# One pooled session for every request; each token has its own
+# RateLimitBudget and every request goes to the token with the most
+# points left, so a token that hits its limit pauses alone.
+# ---------------------------------------------------------------
+class AsyncGraphQLClient:
+    """
+    async with AsyncGraphQLClient(tokens, cache=ResponseCache()) as client:
+        data = await client.run_graphql(QUERY, {"owner": ..., "name": ...})
+
+    tokens is one personal access token or a list of them. With a cache,
+    execute() / run_graphql() answers are cached per (query, variables)
+    and query_repos() answers per repo (fields, owner, name), so a rerun
+    doesn't depend on how the repos were batched the first time.
+    """
+    def __init__(self, tokens, url=GRAPHQL_URL, max_in_flight=MAX_IN_FLIGHT, cache=None):
+        self.url     = url
+        self.cache   = cache
+        self.tokens  = [tokens] if isinstance(tokens, str) else list(tokens)
+        self.budgets = [RateLimitBudget(max_in_flight) for _ in self.tokens]
+        self.metrics = ClientMetrics()
+        self.max_in_flight = max_in_flight
+        self.session = None
+
+    @property
+    def remaining(self):
+        """Points left across all tokens."""
+        return sum(budget.remaining for budget in self.budgets)
+
+    def _pick_token(self):
+        now = time.time()
+        i = max(range(len(self.tokens)),
+                key=lambda i: (self.budgets[i].paused_until <= now,
+                               self.budgets[i].remaining - self.budgets[i].reserved))
+        return self.tokens[i], self.budgets[i]
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers={"Content-Type": "application/json"},
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight * len(self.tokens)),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def execute(self, query, variables=None, cost=1, attempts=MAX_ATTEMPTS, use_cache=True):
+        """
+        POST one query with retries. Returns the response body
+        ({"data": ..., "errors": [...]}), or None if every attempt failed.
+        """
+        if use_cache and self.cache:
+            body = self.cache.get(query, variables)
+            if body is not None:
+                return body
+
+        payload = {"query": query, "variables": variables or {}}
+        for attempt in range(attempts):
+            if attempt:
+                self.metrics.retries += 1
+            token, budget = self._pick_token()
+            await budget.acquire(cost)
+            status = body = remaining = reset_at = None
+            points = 0
+            started = time.perf_counter()
+            try:
+                async with self.session.post(self.url, json=payload,
+                                             headers={"Authorization": f"Bearer {token}"}) as r:
+                    status = r.status
+                    if "X-RateLimit-Remaining" in r.headers:
+                        remaining = int(r.headers["X-RateLimit-Remaining"])
+                    if r.headers.get("X-RateLimit-Reset"):
+                        reset_at = int(r.headers["X-RateLimit-Reset"])
+                    if status == 200:
+                        body = await r.json(content_type=None)
+                        points = 1
+                        # The body's rateLimit is more accurate than the headers
+                        limit = (body.get("data") or {}).get("rateLimit")
+                        if limit:
+                            remaining = limit["remaining"]
+                            reset_at  = parse_reset_at(limit["resetAt"])
+                            points    = limit.get("cost", 1)
+            except asyncio.TimeoutError:
+                self.metrics.record(time.perf_counter() - started, "timeout")
+                print(f"  Timeout on attempt {attempt+1}, retrying...")
+                await budget.release(cost)
+                await asyncio.sleep(10)
+                continue
+            except aiohttp.ClientConnectionError:
+                self.metrics.record(time.perf_counter() - started, "connection error")
+                print(f"  Connection error on attempt {attempt+1}, retrying...")
+                await budget.release(cost)
+                await asyncio.sleep(15)
+                continue
+            self.metrics.record(time.perf_counter() - started, status, points)
+            await budget.release(cost, remaining, reset_at)
+
+            if status == 200:
+                if use_cache and self.cache and cacheable(body):
+                    self.cache.put(query, variables, body)
+                return body
+
+            elif status in (403, 429):
+                # Hard rate limit hit — this token waits until its reset
+                reset = budget.reset_at
+                wait  = max(int(reset - time.time()), 60) if reset else 60
+                print(f"\n🛑 Rate limited (HTTP {status}). Waiting {wait}s...")
+                await budget.pause(wait)
+
+            elif status == 502:
+                # GitHub temporary error — short wait and retry
+                await asyncio.sleep(10 * (attempt + 1))
+
+            else:
+                print(f"  HTTP {status} on attempt {attempt+1}")
+                await asyncio.sleep(5)
+
+        self.metrics.failures += 1
+        return None  # all attempts failed
+
+    async def run_graphql(self, query, variables=None, cost=1):
+        """The query's data, or None if the repo is missing / forbidden or all attempts failed."""
+        body = await self.execute(query, variables, cost)
+        if body is None:
+            return None
+        if "errors" in body:
+            # Repo not found or access denied — skip silently
+            err_msg = body["errors"][0].get("type", "")
+            if err_msg in ("NOT_FOUND", "FORBIDDEN"):
+                return None
+            print(f"  GraphQL error: {body['errors']}")
+            return None
+        return body["data"]
+
+    async def query_repos(self, items, sizer):
+        """
+        Look up many repositories with aliased queries. items is a list of
+        (key, owner, name, fields); returns {key: repository data, or None
+        if it doesn't exist, can't be read or keeps failing}. Repos whose
+        alias errors, or whose whole batch fails, get a query of their own.
+        """
+        results = {}
+        failed  = []
+        pending = []
+        for item in items:
+            cached = self.cache.get(item[3], {"owner": item[1], "name": item[2]}) if self.cache else None
+            if cached is not None:
+                results[item[0]] = cached["repository"]
+            else:
+                pending.append(item)
+        while pending:
+            batch, pending = pending[:sizer.size], pending[sizer.size:]
+            found, batch_failed = await self._query_batch(batch, sizer)
+            results.update(found)
+            failed.extend(batch_failed)
+
+        # Fall back to single-repo queries
+        for item in failed:
+            found, still_failed = await self._query_batch([item])
+            results.update(found)
+            for key, owner, name, _ in still_failed:
+                print(f"  GraphQL query failed for {owner}/{name}")
+                results[key] = None
+        return results
+
+    async def _query_batch(self, batch, sizer=None):
+        """({key: data or None} for the repos answered, [items to retry])."""
+        query = build_repo_query([(f"r{i}", owner, name, fields)
+                                  for i, (_, owner, name, fields) in enumerate(batch)])
+        cost  = sizer.expected_cost(len(batch)) if sizer else 1
+        body  = await self.execute(query, cost=cost, use_cache=False,
+                                   attempts=BATCH_ATTEMPTS if len(batch) > 1 else MAX_ATTEMPTS)
+        if body is None:
+            if sizer:
+                sizer.failed(len(batch))
+            return {}, list(batch)
+
+        data   = body.get("data") or {}
+        errors = alias_errors(body)
+        if sizer and data.get("rateLimit"):
+            sizer.observe(len(batch), data["rateLimit"].get("cost", 1))
+
+        found, failed = {}, []
+        for i, item in enumerate(batch):
+            alias = f"r{i}"
+            if data.get(alias) is not None:
+                found[item[0]] = data[alias]
+            elif errors.get(alias) in ("NOT_FOUND", "FORBIDDEN"):
+                # Repo not found or access denied — same as run_graphql
+                found[item[0]] = None
+            elif alias in errors or alias not in data:
+                failed.append(item)
+                continue
+            else:
+                found[item[0]] = None
+            if self.cache:
+                self.cache.put(item[3], {"owner": item[1], "name": item[2]}, {"repository": found[item[0]]})
+        return found, failed
+
+
+# ---------------------------------------------------------------
+# SYNC ENTRY POINT
+# ---------------------------------------------------------------
+class GraphQLClient:
+    """
+    Blocking wrapper for the collectors that aren't async:
+
+        client = GraphQLClient(tokens, cache=ResponseCache())
+        body   = client.execute(QUERY, variables)
+        client.close()
+
+    Runs an AsyncGraphQLClient on an event loop in a background thread,
+    so every call shares its pooled session, token budgets and metrics.
+    """
+    def __init__(self, tokens, url=GRAPHQL_URL, max_in_flight=MAX_IN_FLIGHT, cache=None):
+        self._loop   = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.client  = AsyncGraphQLClient(tokens, url, max_in_flight, cache)
+        self._call(self.client.__aenter__())
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    @property
+    def metrics(self):
+        return self.client.metrics
+
+    def execute(self, query, variables=None, cost=1, attempts=MAX_ATTEMPTS):
+        return self._call(self.client.execute(query, variables, cost, attempts))
+
+    def run_graphql(self, query, variables=None, cost=1):
+        return self._call(self.client.run_graphql(query, variables, cost))
+
+    def query_repos(self, items, sizer):
+        return self._call(self.client.query_repos(items, sizer))
+
+    def close(self):
+        self._call(self.client.__aexit__(None, None, None))
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
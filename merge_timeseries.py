@@ -0,0 +1,169 @@
+"""
+Merge the commit_series.py shards and keep the forks that were active early,
+streaming — a replacement for combine_jsons.py + filter_unpopular.py that
+never holds the dataset in memory.
+
+Reads every commit_timeseries*.json (legacy JSON arrays, via ijson) and
+commit_timeseries*.jsonl (one result per line) shard in order and writes:
+  repo_good_commits.jsonl — every fork with a non-empty commitTimes
+  repo_healthy.jsonl      — those with more than MIN_COMMITS_3M commits in
+                            the fork month and the two months after it
+A fork seen in several shards is kept once (the first time it has commits);
+the seen set holds an 8-byte hash per fork instead of its name.
+
+Resumable: progress (items read per shard, output sizes) is checkpointed in
+merge_timeseries_progress.json. A rerun after a crash, or after commit_series.py
+appended more results, picks up where the last one stopped. Delete the
+progress file and outputs to start over.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+
+import ijson
+
+SHARD_PATTERNS   = ["commit_timeseries*.json", "commit_timeseries*.jsonl"]
+GOOD_FILE        = "repo_good_commits.jsonl"
+HEALTHY_FILE     = "repo_healthy.jsonl"
+PROGRESS_FILE    = "merge_timeseries_progress.json"
+MIN_COMMITS_3M   = 5        # keep forks with MORE than this many commits in their first 3 months
+CHECKPOINT_EVERY = 10_000   # items between progress checkpoints
+
+SHARD_NUMBER = re.compile(r"commit_timeseries(\d+)\.jsonl?$")
+
+
+# ---------------------------------------------------------------
+# SHARDS
+# ---------------------------------------------------------------
+def list_shards():
+    """Shard files, numbered shards in number order, then the rest by name."""
+    files = {f for pattern in SHARD_PATTERNS for f in glob.glob(pattern)}
+    def order(f):
+        m = SHARD_NUMBER.search(f)
+        return (0, int(m.group(1)), f) if m else (1, 0, f)
+    return sorted(files, key=order)
+
+
+def read_shard(path):
+    """Records of one shard, one at a time."""
+    with open(path, "rb") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                # A line still being written by commit_series.py is read next time
+                if line.endswith(b"\n"):
+                    yield json.loads(line)
+        else:
+            yield from ijson.items(f, "item", use_float=True)
+
+
+# ---------------------------------------------------------------
+# FILTER
+# ---------------------------------------------------------------
+def fork_key(record):
+    """8-byte hash of childOwner/childName, for the seen set."""
+    name   = f"{record['childOwner']}/{record['childName']}".encode()
+    digest = hashlib.blake2b(name, digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def commits_first_3m(record):
+    """Commits in the fork month and the two months after it."""
+    commits = record["commitTimes"]
+    year, month = int(record["forkTime"][:4]), int(record["forkTime"][5:7])
+    total = 0
+    for _ in range(3):
+        total += int(commits.get(f"{year:04d}-{month:02d}", 0))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return total
+
+
+# ---------------------------------------------------------------
+# PROGRESS
+# ---------------------------------------------------------------
+def load_progress():
+    """Items read per shard and the output sizes at the last checkpoint."""
+    if os.path.exists(PROGRESS_FILE):
+        with open(PROGRESS_FILE) as f:
+            progress = json.load(f)
+        # Outputs deleted or cut short since: start over
+        if all(os.path.exists(p) and os.path.getsize(p) >= n for p, n in progress["offsets"].items()):
+            return progress
+    return {"shards": {}, "offsets": {GOOD_FILE: 0, HEALTHY_FILE: 0}}
+
+
+def save_progress(progress, outputs):
+    for path, fout in outputs.items():
+        fout.flush()
+        progress["offsets"][path] = fout.tell()
+    tmp = PROGRESS_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp, PROGRESS_FILE)
+
+
+def open_outputs(progress):
+    """Outputs cut back to the last checkpoint, plus the seen set rebuilt from them."""
+    outputs = {}
+    for path in (GOOD_FILE, HEALTHY_FILE):
+        fout = open(path, "ab")
+        fout.truncate(progress["offsets"][path])
+        fout.seek(0, os.SEEK_END)
+        outputs[path] = fout
+
+    seen = set()
+    with open(GOOD_FILE, "rb") as f:
+        for line in f:
+            seen.add(fork_key(json.loads(line)))
+    return outputs, seen
+
+
+# ---------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------
+def main():
+    progress      = load_progress()
+    outputs, seen = open_outputs(progress)
+    if seen:
+        print(f"Resuming — {len(seen)} forks already in {GOOD_FILE}")
+
+    read = kept = healthy = duplicates = 0
+    for shard in list_shards():
+        already = progress["shards"].get(shard, 0)
+        n = 0
+        for record in read_shard(shard):
+            n += 1
+            if n <= already:
+                continue
+            read += 1
+
+            if record.get("commitTimes"):
+                key = fork_key(record)
+                if key in seen:
+                    duplicates += 1
+                else:
+                    seen.add(key)
+                    line = (json.dumps(record) + "\n").encode()
+                    outputs[GOOD_FILE].write(line)
+                    kept += 1
+                    if commits_first_3m(record) > MIN_COMMITS_3M:
+                        outputs[HEALTHY_FILE].write(line)
+                        healthy += 1
+
+            if read % CHECKPOINT_EVERY == 0:
+                progress["shards"][shard] = n
+                save_progress(progress, outputs)
+
+        progress["shards"][shard] = max(n, already)
+        save_progress(progress, outputs)
+        print(f"  {shard}: {n} items")
+
+    for fout in outputs.values():
+        fout.close()
+    print(f"Read {read} new items: {kept} kept in {GOOD_FILE} "
+          f"({healthy} in {HEALTHY_FILE}), {duplicates} duplicates skipped")
+
+
+if __name__ == "__main__":
+    main()
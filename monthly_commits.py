@@ -0,0 +1,156 @@
+"""
+Monthly commit counts from server-side history totals, for
+gather_metrics.py and gather_metrics_inbatches.py.
+
+Instead of paging through a repo's default-branch history 100 commits at
+a time and bucketing committedDate by month, one query asks for
+history(since:, until:) { totalCount } of every calendar month as
+aliases (m0, m1, ...), so a repo's monthly series costs one round trip
+however many commits it has. Months are UTC, like committedDate[:7], and
+the result has the same shape as monthly_timeseries(): {"YYYY-MM": n}
+for the months with commits, sorted.
+
+commitsPost2m comes from the same counts, plus, only when the month the
+2-month cutoff falls in has commits, one more query for the commit dates
+of that month and of the first one.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from dateutil.relativedelta import relativedelta
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+HISTORY_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+%s
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def month_end(dt):
+    """Last second of dt's month."""
+    month_start = dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return month_start + relativedelta(months=1) - timedelta(seconds=1)
+
+
+def month_windows(since, until):
+    """[(YYYY-MM, start, end)] of the calendar months from since to until (naive UTC)."""
+    windows = []
+    start = since
+    while start <= until:
+        end = min(month_end(start), until)
+        windows.append((start.strftime("%Y-%m"), start, end))
+        start = end.replace(microsecond=0) + timedelta(seconds=1)
+    return windows
+
+
+def fetch_window_counts(client, owner, name, windows):
+    """Commits on the default branch in each (label, start, end) window, or None."""
+    aliases = "\n".join(
+        f'          m{i}: history(since: "{start.strftime(TIME_FORMAT)}", '
+        f'until: "{end.strftime(TIME_FORMAT)}") {{ totalCount }}'
+        for i, (_, start, end) in enumerate(windows)
+    )
+    data = client.execute(HISTORY_QUERY % aliases, {"owner": owner, "name": name})
+    if data is None:
+        print(f"Request failed for {owner}/{name}")
+        return None
+    if "errors" in data:
+        print("GraphQL error:", data["errors"])
+        return None
+
+    repo = (data.get("data") or {}).get("repository")
+    if repo is None or repo["defaultBranchRef"] is None:
+        return None
+    target = repo["defaultBranchRef"]["target"]
+    return [target[f"m{i}"]["totalCount"] for i in range(len(windows))]
+
+
+def monthly_commit_counts(client, owner, name, since):
+    """
+    {"YYYY-MM": commits} from since to now for the months with commits,
+    or None if the repo is gone — same as monthly_timeseries(fetch_commit_dates(...)).
+    Windows run to the end of the current month, so the query (and its
+    cache entry) stays the same for the whole month.
+    """
+    windows = month_windows(since, month_end(datetime.now(timezone.utc).replace(tzinfo=None)))
+    counts  = fetch_window_counts(client, owner, name, windows)
+    if counts is None:
+        return None
+    return {label: n for (label, _, _), n in zip(windows, counts) if n}
+
+
+def fetch_window_dates(client, owner, name, windows):
+    """
+    {label: committedDate of every commit in the window} for (label, start, end)
+    windows, or None if any page failed (partial dates would undercount).
+    """
+    dates   = {label: [] for label, _, _ in windows}
+    cursors = {}
+    pending = list(windows)
+    while pending:
+        aliases = "\n".join(
+            f'          d{i}: history(first: 100, since: "{start.strftime(TIME_FORMAT)}", '
+            f'until: "{end.strftime(TIME_FORMAT)}"'
+            + (f", after: {json.dumps(cursors[label])}" if label in cursors else "")
+            + ") { pageInfo { hasNextPage endCursor } nodes { committedDate } }"
+            for i, (label, start, end) in enumerate(pending)
+        )
+        data = client.execute(HISTORY_QUERY % aliases, {"owner": owner, "name": name})
+        if data is None:
+            print(f"Request failed for {owner}/{name}")
+            return None
+        if "errors" in data:
+            print("GraphQL error:", data["errors"])
+            return None
+        try:
+            target = data["data"]["repository"]["defaultBranchRef"]["target"]
+        except (KeyError, TypeError):
+            print("No data returned:", data)
+            return None
+
+        next_pending = []
+        for i, window in enumerate(pending):
+            history = target[f"d{i}"]
+            dates[window[0]].extend(node["committedDate"] for node in history["nodes"])
+            if history["pageInfo"]["hasNextPage"]:
+                cursors[window[0]] = history["pageInfo"]["endCursor"]
+                next_pending.append(window)
+        pending = next_pending
+    return dates
+
+
+def commits_post_2m(client, owner, name, since, counts):
+    """
+    commitsPost2m() from the monthly counts: commits at least 2 months after
+    the first one. None if the commit dates it needs couldn't be fetched.
+    """
+    if not counts:
+        return 0
+
+    # The cutoff (first commit + 2 months) always falls in the first month + 2
+    first_month  = datetime.strptime(min(counts), "%Y-%m")
+    cutoff_month = first_month + relativedelta(months=2)
+    total = sum(n for month, n in counts.items() if month > cutoff_month.strftime("%Y-%m"))
+    if not counts.get(cutoff_month.strftime("%Y-%m")):
+        return total
+
+    # Otherwise the exact cutoff matters: dates of the first and the cutoff month
+    start = max(since, first_month)
+    dates = fetch_window_dates(client, owner, name, [("first",  start,        month_end(start)),
+                                                     ("cutoff", cutoff_month, month_end(cutoff_month))])
+    if dates is None:
+        return None
+    if not dates["first"]:
+        return total
+    first_commit = min(datetime.fromisoformat(d.replace("Z", "")) for d in dates["first"])
+    cutoff_date  = first_commit + relativedelta(months=2)
+    return total + sum(1 for d in dates["cutoff"] if datetime.fromisoformat(d.replace("Z", "")) >= cutoff_date)
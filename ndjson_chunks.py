@@ -0,0 +1,93 @@
+"""
+Parse a large newline-delimited JSON file in parallel, for 50Kfilter2.py and
+parse_nonfork_events.py.
+
+The file is cut into CHUNK_BYTES byte ranges on line boundaries. Each range
+is parsed in a worker process straight into a DataFrame chunk (no list of
+dicts crosses the process boundary), and the chunks are concatenated in file
+order, so the result is the same as parsing line by line.
+
+parse_line(line) gets one raw line (bytes) and returns a dict of column
+values, or None to skip the line; json.JSONDecodeError / KeyError count as
+errors. convert(df), if given, runs on each chunk in the worker, e.g. to
+parse timestamp columns in parallel too. Both must be module-level functions
+so the worker processes can load them.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+CHUNK_BYTES      = 32 * 1024 * 1024
+PROCESSES        = max(1, (os.cpu_count() or 1) - 1)
+MAX_ERRORS_SHOWN = 5
+
+
+def byte_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """[(start, end)] covering the file; lines are assigned by where they start."""
+    size = os.path.getsize(path)
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def iter_lines(path, start, end):
+    """(offset, line) for every line that starts inside [start, end)."""
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip the rest of the line the previous range owns
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            yield pos, line
+            pos += len(line)
+
+
+def parse_range(job):
+    """One byte range -> (DataFrame chunk, error count, first error messages)."""
+    path, start, end, parse_line, convert = job
+    rows     = []
+    errors   = 0
+    messages = []
+    for pos, line in iter_lines(path, start, end):
+        if not line.strip():
+            continue
+        try:
+            record = parse_line(line)
+        except (json.JSONDecodeError, KeyError) as e:
+            errors += 1
+            if len(messages) < MAX_ERRORS_SHOWN:
+                messages.append(f"Byte {pos} error: {e}")
+            continue
+        if record is not None:
+            rows.append(record)
+
+    chunk = pd.DataFrame.from_records(rows)
+    if convert is not None and len(chunk):
+        chunk = convert(chunk)
+    return chunk, errors, messages
+
+
+def parse_ndjson(path, parse_line, convert=None, processes=PROCESSES, chunk_bytes=CHUNK_BYTES):
+    """(DataFrame of every parsed line in file order, error count)."""
+    jobs = [(path, start, end, parse_line, convert) for start, end in byte_ranges(path, chunk_bytes)]
+    if processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs))) as pool:
+            results = list(pool.map(parse_range, jobs))
+    else:
+        results = [parse_range(job) for job in jobs]
+
+    errors = 0
+    shown  = 0
+    for _, n, messages in results:
+        errors += n
+        for message in messages[:MAX_ERRORS_SHOWN - shown]:
+            print(message)
+            shown += 1
+
+    chunks = [chunk for chunk, _, _ in results if len(chunk)]
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    return df, errors
@@ -1,51 +1,104 @@
+"""
+Audit the collected result shards: records, duplicates, conflicts, nulls
+and errors per file.
+
+    python num_items.py                       # every commit_timeseries* shard
+    python num_items.py combinedbig.json ...  # or the files given
+
+Works on JSON arrays and JSONL files, streaming. Each record is hashed
+canonically (sorted keys), and only two fixed-width digests are kept per
+fork (8-byte childOwner/childName key, 16-byte content), so millions of
+records fit in memory. A record whose key was already seen is a duplicate
+if its content is identical and a conflict if it differs; conflicts are
+counted against the later shard.
+"""
+import hashlib
 import json
-import re
-import glob
-
-# Pattern to match files
-pattern = "combinedbig.json"
-# pattern = "commit_timeseries*.json"
-
-# Regex to extract the number
-regex = re.compile(r"commit_timeseries(\d+)\.json")
-
-# Find all matching files
-files = glob.glob(pattern)
-print(f'files: {files}')
-
-# Sort files by the number in filename
-# files.sort(key=lambda f: int(regex.search(f).group(1)))
-
-combined = []
-
-for filename in files:
-    # with open('combined.json', "r") as f:
-    with open(filename, "r") as f:
-        print(filename)
-        data = json.load(f)
-        print(len(data))
-        uniqueSet = set()
-        unique = []
-        for d in data:
-            s = str(d)
-            if s not in uniqueSet:
-                uniqueSet.add(s)
+import sys
+from collections import Counter
+
+import ijson
+
+from merge_timeseries import list_shards, fork_key
+
+MAX_EXAMPLES = 10   # conflicting forks printed by name
+
+
+def content_digest(record):
+    """16-byte hash of the record with sorted keys, so key order doesn't matter."""
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+    return int.from_bytes(hashlib.blake2b(canonical, digest_size=16).digest(), "little")
+
+
+def read_records(path, stats):
+    """Records of one file; unreadable lines / a truncated array count as errors."""
+    with open(path, "rb") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    stats["errors"] += 1
+        else:
+            try:
+                yield from ijson.items(f, "item", use_float=True)
+            except ijson.JSONError:
+                stats["errors"] += 1
+
+
+def audit(files):
+    seen        = {}          # key digest -> content digest of the first copy
+    null_fields = Counter()
+    examples    = []
+    rows        = []
+
+    for path in files:
+        stats = Counter()
+        for record in read_records(path, stats):
+            stats["records"] += 1
+            if not isinstance(record, dict) or "childOwner" not in record or "childName" not in record:
+                stats["errors"] += 1
+                continue
+
+            nulls = [field for field, value in record.items() if value is None]
+            null_fields.update(nulls)
+            stats["nulls"]  += bool(nulls)
+            # The collectors store the string "errors" when a lookup failed
+            stats["errors"] += any(value == "errors" for value in record.values())
+
+            key     = fork_key(record)
+            content = content_digest(record)
+            if key not in seen:
+                seen[key] = content
+            elif seen[key] == content:
+                stats["duplicates"] += 1
             else:
-                unique.add(s)
-        print('unique')
-        print(unique)
-        print(len(unique))
-
-
-
-    # with open(filename, "w") as f:
-    # #
-        # json.dump(data[:300], f, indent = 2)
-        # data = list(data)
-        # for i, d in enumerate(data):
-        #     if d['parentName'] == 'generative-ai-for-beginners':
-        #         print((i, 'microsoft'))
-        #         print(data[i])
-        #         print(data[i+1])
-        #         print(data[i+2])
-        #         print(data[i+25])
+                stats["conflicts"] += 1
+                if len(examples) < MAX_EXAMPLES:
+                    examples.append(f"{record['childOwner']}/{record['childName']} ({path})")
+        rows.append((path, stats))
+
+    width = max([len(path) for path, _ in rows] + [5])
+    print(f"{'file':<{width}}  {'records':>10}  {'duplicates':>10}  {'conflicts':>10}  {'nulls':>10}  {'errors':>10}")
+    totals = Counter()
+    for path, stats in rows + [("total", None)]:
+        if stats is None:
+            stats = totals
+        else:
+            totals.update(stats)
+        print(f"{path:<{width}}  {stats['records']:>10}  {stats['duplicates']:>10}  "
+              f"{stats['conflicts']:>10}  {stats['nulls']:>10}  {stats['errors']:>10}")
+
+    print(f"\n{len(seen)} unique forks")
+    if null_fields:
+        print("Null fields: " + ", ".join(f"{field} {n}" for field, n in null_fields.most_common()))
+    if examples:
+        print("Conflicting duplicates, e.g.:")
+        for example in examples:
+            print(f"  {example}")
+
+
+if __name__ == "__main__":
+    audit(sys.argv[1:] or list_shards())
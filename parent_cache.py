@@ -0,0 +1,158 @@
+"""
+Persistent cache of parent repositories for Step 3 (forks).
+
+Popular parents have hundreds of forks created within weeks of each
+other, so the parent's side of their divergence windows overlaps almost
+entirely. Instead of one history(since, until) { totalCount } query per
+fork, the parent's default-branch commit dates are fetched once over the
+union of its forks' windows, and each fork's parent_early_commits is a
+binary search over them. Parent metadata (stars, forks, created,
+language) is kept alongside, so it is fetched once per parent rather
+than with every fork.
+
+Commit dates are only paged through when that takes fewer requests than
+counting per fork; otherwise the parent keeps just its metadata and the
+forks fall back to count queries. Delete PARENT_CACHE_FILE to refetch.
+"""
+import json, math, os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from github_client import BatchSizer
+
+PARENT_CACHE_FILE = "step3_parent_cache.json"
+HISTORY_PAGE_SIZE = 100
+
+METADATA_FIELDS = """\
+    nameWithOwner
+    stargazerCount
+    forkCount
+    createdAt
+    primaryLanguage { name }
+"""
+
+HISTORY_FIELDS = """\
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(since: %s, until: %s, first: %d%s) {
+            totalCount
+            pageInfo { hasNextPage endCursor }
+            nodes { committedDate }
+          }
+        }
+      }
+    }"""
+
+
+def to_epoch(timestamp):
+    """ISO 8601 (GitHub or datetime.isoformat()) -> epoch seconds, naive taken as UTC."""
+    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def to_iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parent_fields(since, until, after=None, with_metadata=True):
+    """Fields for one aliased parent: metadata (first page only) + a page of commit dates."""
+    cursor = f", after: {json.dumps(after)}" if after else ""
+    history = HISTORY_FIELDS % (json.dumps(to_iso(since)), json.dumps(to_iso(until)),
+                                HISTORY_PAGE_SIZE, cursor)
+    return (METADATA_FIELDS if with_metadata else "") + history
+
+
+class ParentCache:
+    """
+    parents: nameWithOwner -> {"metadata": {...} or None,
+                               "history": {"since", "until", "commits"} or None}
+    since/until/commits are epoch seconds; commits is sorted, or None when
+    the parent has no default branch.
+    """
+    def __init__(self, path=PARENT_CACHE_FILE):
+        self.path    = path
+        self.parents = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.parents = json.load(f)
+            print(f"Loaded {len(self.parents)} cached parents from {path}")
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.parents, f)
+        os.replace(tmp, self.path)
+
+    def metadata(self, parent):
+        return (self.parents.get(parent) or {}).get("metadata")
+
+    def covers(self, parent, since, until):
+        history = (self.parents.get(parent) or {}).get("history")
+        return history is not None and history["since"] <= since and until <= history["until"]
+
+    def early_commits(self, parent, since, until):
+        """Commits on the parent's default branch in [since, until], or None."""
+        commits = self.parents[parent]["history"]["commits"]
+        if commits is None:
+            return None
+        return bisect_right(commits, until) - bisect_left(commits, since)
+
+    async def fill(self, client, windows, sizer=None):
+        """
+        windows: {parent nameWithOwner: [(since, until), ...]} in epoch
+        seconds, one per fork. Fetches the parents that aren't cached yet
+        or whose cached history doesn't cover all of their forks.
+        """
+        sizer = sizer or BatchSizer()
+        todo  = {}   # parent -> (since, until, number of forks)
+        for parent, spans in windows.items():
+            if parent in self.parents and all(self.covers(parent, s, u) for s, u in spans):
+                continue
+            todo[parent] = (min(s for s, _ in spans), max(u for _, u in spans), len(spans))
+        if not todo:
+            return
+        print(f"Fetching {len(todo)} parent repos ({len(windows) - len(todo)} cached)...")
+
+        commits = {parent: [] for parent in todo}
+        cursors = {}
+        first   = True
+        while todo:
+            items = []
+            for parent, (since, until, _) in todo.items():
+                owner, name = parent.split("/", 1)
+                items.append((parent, owner, name,
+                              parent_fields(since, until, cursors.get(parent), with_metadata=first)))
+            answers = await client.query_repos(items, sizer)
+
+            next_todo = {}
+            for parent, (since, until, n_forks) in todo.items():
+                repo = answers.get(parent)
+                if first:
+                    entry = self.parents.setdefault(parent, {"history": None})
+                    entry["metadata"] = {k: repo[k] for k in
+                                         ("stargazerCount", "forkCount", "createdAt", "primaryLanguage")} if repo else None
+                if not repo:
+                    continue
+
+                ref     = repo.get("defaultBranchRef")
+                history = ref["target"].get("history") if ref else None
+                if history is None:
+                    self.parents[parent]["history"] = {"since": since, "until": until, "commits": None}
+                    continue
+
+                commits[parent].extend(to_epoch(node["committedDate"]) for node in history["nodes"])
+                if not history["pageInfo"]["hasNextPage"]:
+                    self.parents[parent]["history"] = {"since": since, "until": until,
+                                                       "commits": sorted(commits[parent])}
+                    continue
+
+                # Keep paging only while that beats one count query per fork
+                pages_left = math.ceil((history["totalCount"] - len(commits[parent])) / HISTORY_PAGE_SIZE)
+                if pages_left < n_forks:
+                    cursors[parent]   = history["pageInfo"]["endCursor"]
+                    next_todo[parent] = (since, until, n_forks)
+            todo  = next_todo
+            first = False
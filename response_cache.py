@@ -0,0 +1,110 @@
+"""
+On-disk cache of GitHub GraphQL answers, shared by every collector.
+
+Entries are keyed by (sha256 of the query text, variables) and stored in
+one SQLite file, so a rerun after a crash or a downstream change gets
+the answers it already paid rate-limit points for without asking again.
+
+Only complete answers are kept: responses with data and no errors
+other than NOT_FOUND / FORBIDDEN (missing repos stay missing). Entries
+expire after TTL_SECONDS, and once the file holds more than MAX_BYTES
+of answers the least recently used are evicted. Delete CACHE_FILE to
+start over.
+
+Pass it to the client (github_client.py), whose execute() looks every
+query up here first and stores the cacheable answers:
+
+    cache  = ResponseCache()
+    client = GraphQLClient(GITHUB_TOKENS, GITHUB_API_URL, cache=cache)
+    print(cache.summary())
+"""
+import hashlib, json, sqlite3, time
+
+CACHE_FILE  = "graphql_cache.sqlite"
+TTL_SECONDS = 30 * 86400        # GitHub data changes; refetch after a month
+MAX_BYTES   = 1024**3           # evict least recently used beyond 1 GB
+EVICT_TO    = 0.9               # ... down to 90% of MAX_BYTES
+
+CACHEABLE_ERRORS = ("NOT_FOUND", "FORBIDDEN")
+
+
+def cacheable(body):
+    """True for answers worth keeping (not rate limits, timeouts or server errors)."""
+    if not isinstance(body, dict) or body.get("data") is None:
+        return False
+    return all(err.get("type") in CACHEABLE_ERRORS for err in body.get("errors") or [])
+
+
+def cache_key(query, variables=None):
+    query_hash = hashlib.sha256(query.encode()).hexdigest()
+    return query_hash + ":" + json.dumps(variables or {}, sort_keys=True, separators=(",", ":"))
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_FILE, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.path      = path
+        self.ttl       = ttl
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+        # autocommit; GraphQLClient uses the cache from its event loop thread
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                               key     TEXT PRIMARY KEY,
+                               value   TEXT NOT NULL,
+                               size    INTEGER NOT NULL,
+                               created REAL NOT NULL,
+                               used    REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, query, variables=None):
+        """The cached answer, or None."""
+        key = cache_key(query, variables)
+        row = self.db.execute("SELECT value, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row and self.ttl is not None and row[2] + self.ttl < now:
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.size -= row[1]
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query, variables, value):
+        key  = cache_key(query, variables)
+        text = json.dumps(value, separators=(",", ":"))
+        now  = time.time()
+        old  = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                        (key, text, len(text), now, now))
+        self.size += len(text) - (old[0] if old else 0)
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        target = self.max_bytes * EVICT_TO
+        rows   = self.db.execute("SELECT key, size FROM responses ORDER BY used").fetchall()
+        evict  = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            evict.append((key,))
+            self.size -= size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", evict)
+        self.evictions += len(evict)
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate    = self.hits / lookups * 100 if lookups else 0
+        return (f"Response cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+                f"{self.evictions} evicted, {self.size / 1024**2:.1f} MB in {self.path}")
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,115 @@
+"""
+Compact first-open / first-response tracking for the Step 2 responsiveness
+metrics (early_activity.py), and the per-repo response-time statistics
+shared with step2_from_event_store.py.
+
+Instead of repo -> {str(number) -> datetime} dicts, a ResponseTimes store
+interns repo names to integer ids and appends (repo_id << 32 | number, epoch
+seconds) pairs to two int64 arrays, 16 bytes per event. Duplicates are
+reduced with NumPy when the arrays grow (and at the end): the first recorded
+open wins, the earliest response wins, as before.
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+COMPACT_EVERY = 1_000_000   # appended entries between reductions
+PERCENTILE    = 0.9         # p90_* columns
+
+
+def _reduce(keys, times, keep):
+    """One (key, time) per key, sorted by key: the first recorded time or the minimum."""
+    keys  = np.frombuffer(keys,  dtype=np.int64)
+    times = np.frombuffer(times, dtype=np.int64)
+    if keep == "first":
+        keys, first = np.unique(keys, return_index=True)   # index of the first occurrence
+        return keys, times[first]
+    order = np.lexsort((times, keys))
+    keys, times = keys[order], times[order]
+    first = np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.array([], dtype=bool)
+    return keys[first], times[first]
+
+
+class _TimeArray:
+    """Append-only (key, epoch seconds) pairs, reduced by keep="first" or "min"."""
+    def __init__(self, keep):
+        self.keep  = keep
+        self.keys  = array("q")
+        self.times = array("q")
+        self.compact_at = COMPACT_EVERY
+
+    def append(self, key, t):
+        self.keys.append(key)
+        self.times.append(t)
+        if len(self.keys) >= self.compact_at:
+            self.compact()
+
+    def extend(self, keys, times):
+        self.keys.frombytes(keys.astype(np.int64).tobytes())
+        self.times.frombytes(times.astype(np.int64).tobytes())
+        if len(self.keys) >= self.compact_at:
+            self.compact()
+
+    def reduced(self):
+        return _reduce(self.keys, self.times, self.keep)
+
+    def compact(self):
+        # Reduced entries stay in front of later ones, so "first" keeps working
+        keys, times = self.reduced()
+        self.keys  = array("q", keys.tobytes())
+        self.times = array("q", times.tobytes())
+        self.compact_at = max(COMPACT_EVERY, 2 * len(self.keys))
+
+
+class ResponseTimes:
+    """When each issue (or PR) of each repo was opened and first responded to."""
+    def __init__(self):
+        self.repos     = []       # repo id -> name
+        self.repo_ids  = {}       # name -> repo id
+        self.opened    = _TimeArray("first")
+        self.responded = _TimeArray("min")
+
+    def _repo_id(self, repo):
+        repo_id = self.repo_ids.get(repo)
+        if repo_id is None:
+            repo_id = self.repo_ids[repo] = len(self.repos)
+            self.repos.append(repo)
+        return repo_id
+
+    def _key(self, repo, number):
+        return self._repo_id(repo) << 32 | number
+
+    def open(self, repo, number, t):
+        self.opened.append(self._key(repo, number), t)
+
+    def respond(self, repo, number, t):
+        self.responded.append(self._key(repo, number), t)
+
+    def merge(self, other):
+        """Fold a later partial store into this one (archive order)."""
+        ids = np.array([self._repo_id(repo) for repo in other.repos], dtype=np.int64)
+        for mine, theirs in [(self.opened, other.opened), (self.responded, other.responded)]:
+            keys, times = theirs.reduced()
+            mine.extend(ids[keys >> 32] << 32 | (keys & 0xFFFFFFFF), times)
+        return self
+
+    def hours(self):
+        """(repo names, hours from open to first response) for items with both, responses >= 0."""
+        open_keys, open_times = self.opened.reduced()
+        resp_keys, resp_times = self.responded.reduced()
+        keys, i, j = np.intersect1d(open_keys, resp_keys, assume_unique=True, return_indices=True)
+        hrs  = (resp_times[j] - open_times[i]) / 3600
+        keep = hrs >= 0
+        names = np.array(self.repos, dtype=object)[keys[keep] >> 32] if len(self.repos) else np.array([], dtype=object)
+        return names, hrs[keep]
+
+
+def response_stats(repo_names, hours, kind):
+    """avg / median / p90 first-response hours per repo, as {kind}-named columns."""
+    hrs = pd.Series(np.asarray(hours, dtype=float)).groupby(np.asarray(repo_names, dtype=object))
+    return pd.DataFrame({
+        f"avg_{kind}_first_response_hrs":    hrs.mean(),
+        f"median_{kind}_first_response_hrs": hrs.median(),
+        f"p90_{kind}_first_response_hrs":    hrs.quantile(PERCENTILE),
+    })
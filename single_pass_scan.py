@@ -0,0 +1,115 @@
+"""
+Single GH Archive pass for every archive-based step.
+Replaces running step2_local.py and sustainability_labels.py one after another:
+each hourly file is downloaded and decompressed once and fed to the
+Step 2 and sustainability consumers of every cohort (cohorts.py) whose
+time window covers it. `python single_pass_scan.py forks` runs only the forks.
+
+Each consumer keeps the same progress file as its standalone script.
+Sustainability labels are written to sustainability_labels*.csv and
+picked up by step4_derived.py (or merged right
+away if final_dataset*.csv already exists).
+"""
+import os
+from datetime import datetime
+
+from cohorts import COHORTS, selected
+from gharchive_scanner import ArchiveScanner, load_repo_lookup
+from early_activity import EarlyActivityConsumer
+from sustainability import SustainabilityConsumer, merge_labels
+
+# ---------------------------------------------------------------
+# WINDOWS
+# ---------------------------------------------------------------
+EARLY_START   = datetime(2023, 12, 1)
+EARLY_END     = datetime(2024, 7, 31)
+SUSTAIN_START = datetime(2025, 6, 1)
+SUSTAIN_END   = datetime(2026, 1, 31)
+
+# ---------------------------------------------------------------
+# EVENT STORE — off by default (needs pyarrow)
+# Also keep every tracked-repo event of both cohorts, over both
+# windows, in a Parquet store so metrics can be recomputed later with
+# step2_from_event_store.py without another download.
+# ---------------------------------------------------------------
+EVENT_STORE_DIR = None   # e.g. "event_store"
+
+# ---------------------------------------------------------------
+# ACTIVITY MATRIX — off by default
+# Per-repo, per-month push / PR / issue / release counts for both
+# cohorts (activity_matrix.py), so other label definitions (12-18
+# months, "at least k active months", PRs, ...) can be derived from
+# activity_matrix*.npz without another pass. Months outside
+# MATRIX_START..MATRIX_END are marked unobserved; the default covers
+# the sustainability window only. The matrix is built in memory and
+# saved at the end, so it has no progress file.
+# ---------------------------------------------------------------
+ACTIVITY_MATRIX = False
+MATRIX_START    = SUSTAIN_START
+MATRIX_END      = SUSTAIN_END
+
+
+def main(cohorts=None):
+    cohorts = cohorts or selected(default=COHORTS)
+
+    # ---------------------------------------------------------------
+    # LOAD REPOS
+    # Sustainability only needs repo_name + created_at, which the
+    # repos tables already have — no need to wait for Step 4.
+    # ---------------------------------------------------------------
+    lookups = {cohort.name: load_repo_lookup(cohort.repos_table) for cohort in cohorts}
+
+    print("Loaded " + " and ".join(f"{len(lookups[c.name])} {c.name} repos" for c in cohorts) + ".")
+
+    activity = {c.name: EarlyActivityConsumer(c.name, lookups[c.name], EARLY_START, EARLY_END,
+                                              c.step2_progress)
+                for c in cohorts}
+    labels   = {c.name: SustainabilityConsumer(f"{c.name} labels", lookups[c.name], SUSTAIN_START, SUSTAIN_END,
+                                               c.sustain_progress)
+                for c in cohorts}
+
+    # ---------------------------------------------------------------
+    # MAIN LOOP
+    # ---------------------------------------------------------------
+    consumers = list(activity.values()) + list(labels.values())
+    if EVENT_STORE_DIR:
+        from event_store import EventStoreConsumer
+        all_repos = {repo: created for lookup in lookups.values() for repo, created in lookup.items()}
+        # One per window, so the months in between are still skipped
+        consumers += [
+            EventStoreConsumer("early events", all_repos, EARLY_START, EARLY_END,
+                               EVENT_STORE_DIR, "event_store_progress.txt"),
+            EventStoreConsumer("window events", all_repos, SUSTAIN_START, SUSTAIN_END,
+                               EVENT_STORE_DIR, "event_store_progress_window.txt"),
+        ]
+
+    matrices = {}
+    if ACTIVITY_MATRIX:
+        from activity_matrix import ActivityMatrixConsumer
+        matrices = {c.name: ActivityMatrixConsumer(f"{c.name} activity matrix", lookups[c.name],
+                                                   MATRIX_START, MATRIX_END)
+                    for c in cohorts}
+        consumers += list(matrices.values())
+
+    ArchiveScanner(consumers).run()
+
+    # ---------------------------------------------------------------
+    # BUILD OUTPUT FILES
+    # ---------------------------------------------------------------
+    for c in cohorts:
+        activity[c.name].write_outputs(c.activity_file, c.responsiveness_file, c.contributors_file)
+
+        df_labels = labels[c.name].labels()
+        df_labels.to_csv(c.labels_file, index=False)
+        print(f"Saved {c.labels_file}")
+        if os.path.exists(c.dataset_file):
+            merge_labels(df_labels, c.dataset_file)
+
+        if c.name in matrices:
+            matrices[c.name].matrix().save(c.matrix_file)
+
+    print("\nAll archive outputs saved. Ready for Step 3.")
+
+
+if __name__ == "__main__":
+    main()
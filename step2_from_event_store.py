@@ -0,0 +1,112 @@
+"""
+Recompute the Step 2 outputs from the columnar event store instead of the archive.
+Build the store once by setting EVENT_STORE_DIR in single_pass_scan.py;
+after that, a changed EARLY_DAYS or metric definition takes seconds
+instead of another archive download.
+
+Writes the same files as step2_local.py for every cohort (cohorts.py), so
+step4_derived.py can be rerun right after.
+"""
+import pandas as pd
+
+from cohorts import COHORTS, selected
+from gharchive_scanner import load_repo_lookup
+from event_store import read_event_store
+from early_activity import RESPONSIVENESS_COLUMNS
+from response_times import response_stats
+
+STORE_DIR  = "event_store"
+EARLY_DAYS = 182  # 6 months
+
+
+def early_events(events, repo_lookup, early_days=EARLY_DAYS):
+    """Events inside each repo's first early_days days (inclusive at both ends)."""
+    created = pd.Series(repo_lookup, name="repo_created_at")
+    ev = events.join(created, on="repo_name", how="inner")
+    in_window = (ev["created_at"] >= ev["repo_created_at"]) & \
+                (ev["created_at"] <= ev["repo_created_at"] + pd.Timedelta(days=early_days))
+    return ev[in_window]
+
+
+def _first_response_stats(ev, open_type, response_type, kind):
+    # opened_at of the first "opened" event per number vs. the earliest comment on it
+    opened = ev[(ev["type"] == open_type) & (ev["action"] == "opened")
+                & ev["number"].notna() & ev["opened_at"].notna()]
+    opened = opened.drop_duplicates(["repo_name", "number"])[["repo_name", "number", "opened_at"]]
+
+    responses = ev[(ev["type"] == response_type) & ev["number"].notna()]
+    responses = responses.groupby(["repo_name", "number"])["created_at"].min().rename("responded_at")
+
+    pairs = opened.join(responses, on=["repo_name", "number"], how="inner")
+    hrs   = (pairs["responded_at"] - pairs["opened_at"]).dt.total_seconds() / 3600
+    keep  = hrs >= 0
+    return response_stats(pairs["repo_name"][keep].to_numpy(), hrs[keep].to_numpy(), kind)
+
+
+def early_metrics(ev, repo_names):
+    """Activity, responsiveness and contributor frames, as step2_local.py writes them."""
+    ev = ev.assign(merged=ev["merged"].fillna(False).astype(bool))
+    is_type = {t: ev["type"] == t for t in ev["type"].unique()}
+    def count(mask):
+        return mask.groupby(ev["repo_name"]).sum()
+    def of_type(t):
+        return is_type.get(t, pd.Series(False, index=ev.index))
+
+    pushes = ev[of_type("PushEvent")]
+    df_activity = pd.DataFrame({
+        "total_commits":         count(of_type("PushEvent")),
+        "unique_commit_authors": pushes.groupby("repo_name")["actor"].nunique(dropna=False),
+        "issues_opened":         count(of_type("IssuesEvent") & (ev["action"] == "opened")),
+        "issues_closed":         count(of_type("IssuesEvent") & (ev["action"] == "closed")),
+        "prs_opened":            count(of_type("PullRequestEvent") & (ev["action"] == "opened")),
+        "prs_merged":            count(of_type("PullRequestEvent") & (ev["action"] == "closed") & ev["merged"]),
+        "prs_rejected":          count(of_type("PullRequestEvent") & (ev["action"] == "closed") & ~ev["merged"]),
+        "num_releases":          count(of_type("ReleaseEvent") & (ev["action"] == "published")),
+        "star_count":            count(of_type("WatchEvent") & (ev["action"] == "started")),
+        "fork_count":            count(of_type("ForkEvent")),
+        "total_issue_comments":  count(of_type("IssueCommentEvent")),
+        "total_pr_comments":     count(of_type("PullRequestReviewCommentEvent")),
+    })
+    df_activity = df_activity.reindex(sorted(repo_names)).fillna(0).astype(int)
+    df_activity = df_activity.rename_axis("repo_name").reset_index()
+
+    df_resp = pd.concat([
+        _first_response_stats(ev, "IssuesEvent",      "IssueCommentEvent",             "issue"),
+        _first_response_stats(ev, "PullRequestEvent", "PullRequestReviewCommentEvent", "pr"),
+    ], axis=1).reindex(sorted(repo_names))[RESPONSIVENESS_COLUMNS]
+    df_resp = df_resp.rename_axis("repo_name").reset_index()
+
+    df_contrib = (
+        pushes.assign(month=pushes["created_at"].dt.strftime("%Y-%m"))
+              .groupby(["repo_name", "month", "actor"], dropna=False).size()
+              .rename("commit_count").reset_index()
+              .rename(columns={"actor": "contributor"})
+    )
+    return df_activity, df_resp, df_contrib
+
+
+def main(cohorts=None):
+    cohorts = cohorts or selected(default=COHORTS)
+
+    print(f"Loading event store {STORE_DIR}...")
+    events = read_event_store(STORE_DIR)
+    print(f"Loaded {len(events)} events.")
+
+    for cohort in cohorts:
+        repo_lookup = load_repo_lookup(cohort.repos_table)
+        ev = early_events(events, repo_lookup, EARLY_DAYS)
+        df_activity, df_resp, df_contrib = early_metrics(ev, repo_lookup.keys())
+
+        df_activity.to_csv(cohort.activity_file, index=False)
+        print(f"Saved {cohort.activity_file} — {len(df_activity)} repos")
+        print(f"  Repos with commits: {(df_activity['total_commits'] > 0).sum()}")
+        df_resp.to_csv(cohort.responsiveness_file, index=False)
+        print(f"Saved {cohort.responsiveness_file}")
+        df_contrib.to_csv(cohort.contributors_file, index=False)
+        print(f"Saved {cohort.contributors_file} — {len(df_contrib)} contributor-month records")
+
+    print("\nStep 2 outputs rebuilt from the event store. Rerun Step 4 to update the datasets.")
+
+
+if __name__ == "__main__":
+    main()
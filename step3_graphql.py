@@ -1,94 +1,43 @@
-import requests
+import asyncio
+import json
 import pandas as pd
 import time
 import os
 from datetime import datetime, timedelta
 
-GITHUB_TOKEN = ""
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Content-Type": "application/json"
-}
+from cohorts import selected
+from github_client import AsyncGraphQLClient, BatchSizer
+from response_cache import ResponseCache
+from parent_cache import ParentCache, to_epoch
+
+GITHUB_TOKENS = [""]   # one or more personal access tokens; requests rotate across them
 GRAPHQL_URL   = "https://api.github.com/graphql"
-OUTPUT_FILE   = "step3_governance_metadata.csv"
-PROGRESS_FILE = "step3_progress.txt"
 
 # ---------------------------------------------------------------
-# RATE LIMIT STATE
-# GitHub GraphQL allows 5000 points/hour
-# Each query costs ~1 point. We make up to 3 calls per repo.
-# We proactively pause when remaining points get low.
+# CONCURRENCY
+# GitHub GraphQL allows 5000 points/hour. Repos are looked up in
+# groups with aliased queries (see github_client.py): one metadata
+# query per group, then the parents of every fork at once (see
+# parent_cache.py), then one divergence query per group for the
+# forks. Every request goes through one shared rate-limit budget
+# which pauses when the points run low. The cohorts (cohorts.py)
+# run one after another in the same session, each with its own
+# output and progress file.
 # ---------------------------------------------------------------
-rate_limit_remaining = 5000
-rate_limit_reset_at  = None
-
-def run_graphql(query, variables=None):
-    global rate_limit_remaining, rate_limit_reset_at
-
-    # Proactively pause if running low on points
-    if rate_limit_remaining < 50:
-        if rate_limit_reset_at:
-            wait = max(int((rate_limit_reset_at - time.time())), 10)
-        else:
-            wait = 60
-        print(f"\n⏳ Rate limit low ({rate_limit_remaining} remaining). Pausing {wait}s...")
-        time.sleep(wait)
-        rate_limit_remaining = 5000  # reset estimate after waiting
-
-    payload = {"query": query, "variables": variables or {}}
-
-    for attempt in range(5):
-        try:
-            r = requests.post(GRAPHQL_URL, json=payload, headers=HEADERS, timeout=30)
-
-            # Always update rate limit state from headers
-            rate_limit_remaining = int(r.headers.get("X-RateLimit-Remaining", rate_limit_remaining))
-            reset_ts = r.headers.get("X-RateLimit-Reset")
-            if reset_ts:
-                rate_limit_reset_at = int(reset_ts)
-
-            if r.status_code == 200:
-                data = r.json()
-                if "errors" in data:
-                    # Repo not found or access denied — skip silently
-                    err_msg = data["errors"][0].get("type", "")
-                    if err_msg in ("NOT_FOUND", "FORBIDDEN"):
-                        return None
-                    print(f"  GraphQL error: {data['errors']}")
-                    return None
-                return data["data"]
-
-            elif r.status_code in (403, 429):
-                # Hard rate limit hit — wait until reset
-                wait = max(int(rate_limit_reset_at - time.time()), 60) if rate_limit_reset_at else 60
-                print(f"\n🛑 Rate limited (HTTP {r.status_code}). Waiting {wait}s...")
-                time.sleep(wait)
-
-            elif r.status_code == 502:
-                # GitHub temporary error — short wait and retry
-                time.sleep(10 * (attempt + 1))
-
-            else:
-                print(f"  HTTP {r.status_code} on attempt {attempt+1}")
-                time.sleep(5)
-
-        except requests.exceptions.Timeout:
-            print(f"  Timeout on attempt {attempt+1}, retrying...")
-            time.sleep(10)
-        except requests.exceptions.ConnectionError:
-            print(f"  Connection error on attempt {attempt+1}, retrying...")
-            time.sleep(15)
-
-    return None  # all attempts failed
+REPOS_IN_FLIGHT = 4    # groups of repos worked on at once
+BATCH_SIZE      = 50   # repos per group; save to CSV after each
+EARLY_DAYS      = 182
 
 
 # ---------------------------------------------------------------
 # QUERIES
+# Fields asked for each aliased repository(...) in a batched query.
+# Parent metadata comes from the parent cache; the same fields asked
+# with the fork are the fallback when the parent lookup fails.
+# Cohorts without divergence (non-forks) have no parent to compare
+# against, so they skip the parent and branch fields.
 # ---------------------------------------------------------------
-REPO_QUERY = """
-query($owner: String!, $name: String!) {
-  rateLimit { remaining resetAt }
-  repository(owner: $owner, name: $name) {
+REPO_FIELDS = """\
     nameWithOwner
     isFork
     parent {
@@ -106,53 +55,57 @@ query($owner: String!, $name: String!) {
     repositoryTopics(first: 10) {
       nodes { topic { name } }
     }
-    defaultBranchRef { name }
-  }
-}
-"""
-
-DIVERGENCE_QUERY = """
-query($owner: String!, $name: String!, $since: GitTimestamp!, $until: GitTimestamp!) {
-  rateLimit { remaining resetAt }
-  repository(owner: $owner, name: $name) {
+    defaultBranchRef { name }"""
+
+NONFORK_REPO_FIELDS = """\
+    nameWithOwner
+    isFork
+    contributing: object(expression: "HEAD:CONTRIBUTING.md") { id }
+    codeOfConduct: object(expression: "HEAD:CODE_OF_CONDUCT.md") { id }
+    license: licenseInfo { name }
+    cicd: object(expression: "HEAD:.github/workflows") { id }
+    primaryLanguage { name }
+    repositoryTopics(first: 10) {
+      nodes { topic { name } }
+    }"""
+
+DIVERGENCE_FIELDS = """\
     defaultBranchRef {
       target {
         ... on Commit {
-          history(since: $since, until: $until) { totalCount }
+          history(since: %s, until: %s) { totalCount }
         }
       }
-    }
-  }
-}
-"""
+    }"""
+
+# Batch sizes adapt separately to the cost of each kind of query
+metadata_sizer   = BatchSizer()
+parent_sizer     = BatchSizer()
+divergence_sizer = BatchSizer()
 
 
 # ---------------------------------------------------------------
-# PROCESS ONE REPO
+# PROCESS A GROUP OF REPOS
 # ---------------------------------------------------------------
 def parse_owner_name(repo_name):
     parts = repo_name.split("/")
     return (parts[0], parts[1]) if len(parts) == 2 else (None, None)
 
-def get_repo_metadata(repo_name, created_at):
-    global rate_limit_remaining
+def early_window(created_at):
+    """(since, until) ISO strings of the first EARLY_DAYS after created_at."""
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    return created_at.isoformat(), (created_at + timedelta(days=EARLY_DAYS)).isoformat()
 
-    owner, name = parse_owner_name(repo_name)
-    if not owner:
+def early_commits(repo):
+    """totalCount of a DIVERGENCE_FIELDS answer, or None."""
+    if not repo:
         return None
+    ref = repo.get("defaultBranchRef")
+    return ref["target"]["history"]["totalCount"] if ref else None
 
+def metadata_record(repo_name, repo, parent_meta):
     result = {"repo_name": repo_name}
-
-    # --- Call 1: governance + metadata ---
-    data = run_graphql(REPO_QUERY, {"owner": owner, "name": name})
-    if not data or not data.get("repository"):
-        return None
-
-    # Update rate limit from response body (more accurate than headers)
-    if data.get("rateLimit"):
-        rate_limit_remaining = data["rateLimit"]["remaining"]
-
-    repo = data["repository"]
     result["has_contributing"]    = repo["contributing"] is not None
     result["has_code_of_conduct"] = repo["codeOfConduct"] is not None
     result["has_license"]         = repo["license"] is not None
@@ -164,132 +117,205 @@ def get_repo_metadata(repo_name, created_at):
 
     parent = repo.get("parent")
     if parent:
+        # Cached parent metadata, else what came with the fork's own answer
+        meta = parent_meta or parent
         result["parent_repo"]       = parent["nameWithOwner"]
-        result["parent_stars"]      = parent["stargazerCount"]
-        result["parent_forks"]      = parent["forkCount"]
-        result["parent_created_at"] = parent["createdAt"]
-        result["parent_language"]   = parent["primaryLanguage"]["name"] if parent["primaryLanguage"] else None
+        result["parent_stars"]      = meta.get("stargazerCount")
+        result["parent_forks"]      = meta.get("forkCount")
+        result["parent_created_at"] = meta.get("createdAt")
+        result["parent_language"]   = (meta.get("primaryLanguage") or {}).get("name")
     else:
         result["parent_repo"]       = None
         result["parent_stars"]      = None
         result["parent_forks"]      = None
         result["parent_created_at"] = None
         result["parent_language"]   = None
+    return result
 
-    # --- Call 2: fork divergence ---
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-
-    since = created_at.isoformat()
-    until = (created_at + timedelta(days=182)).isoformat()
-
-    div_data = run_graphql(DIVERGENCE_QUERY, {
-        "owner": owner, "name": name,
-        "since": since, "until": until
-    })
-
-    if div_data:
-        if div_data.get("rateLimit"):
-            rate_limit_remaining = div_data["rateLimit"]["remaining"]
-        ref = div_data.get("repository", {}).get("defaultBranchRef")
-        if ref:
-            result["early_commits_on_branch"] = ref["target"]["history"]["totalCount"]
-        else:
+def metadata_only_records(repos, metadata):
+    """Records of the repos found, for cohorts without divergence."""
+    records = []
+    for repo_name, _ in repos:
+        if metadata.get(repo_name):
+            # No parent or divergence fields, even if the answer had a parent
+            result = metadata_record(repo_name, {**metadata[repo_name], "parent": None}, None)
             result["early_commits_on_branch"] = None
-    else:
-        result["early_commits_on_branch"] = None
-
-    # --- Call 3: parent divergence (only if fork has a parent) ---
-    if parent:
-        p_owner, p_name = parse_owner_name(parent["nameWithOwner"])
-        p_data = run_graphql(DIVERGENCE_QUERY, {
-            "owner": p_owner, "name": p_name,
-            "since": since, "until": until
-        })
-        if p_data:
-            if p_data.get("rateLimit"):
-                rate_limit_remaining = p_data["rateLimit"]["remaining"]
-            ref = p_data.get("repository", {}).get("defaultBranchRef")
-            if ref:
-                p_commits = ref["target"]["history"]["totalCount"]
-                result["parent_early_commits"] = p_commits
-                total = (result["early_commits_on_branch"] or 0) + p_commits
-                result["divergence_ratio"] = (
-                    result["early_commits_on_branch"] / total if total > 0 and result["early_commits_on_branch"] is not None else None
-                )
-            else:
-                result["parent_early_commits"] = None
-                result["divergence_ratio"]     = None
+            result["parent_early_commits"]    = None
+            result["divergence_ratio"]        = None
+            records.append(result)
+    return records
+
+async def get_group_metadata(client, repos, fields=REPO_FIELDS):
+    """repos: list of (repo_name, created_at). Returns {repo_name: repository data} of the repos found."""
+    items = []
+    for repo_name, _ in repos:
+        owner, name = parse_owner_name(repo_name)
+        if owner:
+            items.append((repo_name, owner, name, fields))
+    answers = await client.query_repos(items, metadata_sizer)
+    return {repo_name: repo for repo_name, repo in answers.items() if repo}
+
+def parent_windows(repos, metadata):
+    """{parent: [(since, until), ...]} in epoch seconds, one window per fork."""
+    windows = {}
+    for repo_name, created_at in repos:
+        repo = metadata.get(repo_name)
+        if repo and repo.get("parent"):
+            since, until = early_window(created_at)
+            windows.setdefault(repo["parent"]["nameWithOwner"], []).append((to_epoch(since), to_epoch(until)))
+    return windows
+
+async def get_group_divergence(client, repos, metadata, parents):
+    """Records of the repos found, with fork and parent divergence filled in."""
+    # --- Call 2: fork divergence, plus the parents the cache can't answer ---
+    records = {}
+    items   = []
+    for repo_name, created_at in repos:
+        repo = metadata.get(repo_name)
+        if not repo:
+            continue
+        parent = repo["parent"]["nameWithOwner"] if repo.get("parent") else None
+        records[repo_name] = metadata_record(repo_name, repo, parents.metadata(parent) if parent else None)
+
+        since, until = early_window(created_at)
+        fields = DIVERGENCE_FIELDS % (json.dumps(since), json.dumps(until))
+
+        owner, name = parse_owner_name(repo_name)
+        items.append(((repo_name, "fork"), owner, name, fields))
+        if parent and not parents.covers(parent, to_epoch(since), to_epoch(until)):
+            p_owner, p_name = parse_owner_name(parent)
+            items.append(((repo_name, "parent"), p_owner, p_name, fields))
+    divergence = await client.query_repos(items, divergence_sizer)
+
+    # --- Call 3: parent divergence, answered from the cache where possible ---
+    for repo_name, created_at in repos:
+        result = records.get(repo_name)
+        if not result:
+            continue
+        result["early_commits_on_branch"] = early_commits(divergence.get((repo_name, "fork")))
+
+        parent = result["parent_repo"]
+        since, until = early_window(created_at)
+        if parent and parents.covers(parent, to_epoch(since), to_epoch(until)):
+            p_commits = parents.early_commits(parent, to_epoch(since), to_epoch(until))
+        else:
+            p_commits = early_commits(divergence.get((repo_name, "parent")))
+
+        if p_commits is not None:
+            result["parent_early_commits"] = p_commits
+            total = (result["early_commits_on_branch"] or 0) + p_commits
+            result["divergence_ratio"] = (
+                result["early_commits_on_branch"] / total if total > 0 and result["early_commits_on_branch"] is not None else None
+            )
         else:
             result["parent_early_commits"] = None
             result["divergence_ratio"]     = None
-    else:
-        result["parent_early_commits"] = None
-        result["divergence_ratio"]     = None
 
-    return result
+    return list(records.values())
 
 
 # ---------------------------------------------------------------
 # MAIN LOOP
 # ---------------------------------------------------------------
-repos_df   = pd.read_csv("step2b_activity.csv")[["repo_name"]].copy()
-repos_meta = pd.read_csv("repos_table.csv")[["repo_name", "created_at"]]
-repos_df   = repos_df.merge(repos_meta, on="repo_name", how="left")
-
-# Load already processed repos for resume
-done_repos = set()
-if os.path.exists(PROGRESS_FILE):
-    with open(PROGRESS_FILE) as f:
-        done_repos = set(line.strip() for line in f if line.strip())
-    print(f"Resuming — {len(done_repos)} repos already done, "
-          f"{len(repos_df) - len(done_repos)} remaining.")
-
-# Check if output file exists (for append mode)
-file_exists = os.path.exists(OUTPUT_FILE)
-
-total      = len(repos_df)
-batch      = []
-BATCH_SIZE = 50   # save to CSV every 50 repos
-start_time = time.time()
-
-for i, row in repos_df.iterrows():
-    if row["repo_name"] in done_repos:
-        continue
-
-    record = get_repo_metadata(row["repo_name"], row["created_at"])
-    if record:
-        batch.append(record)
-
-    # Mark progress
-    with open(PROGRESS_FILE, "a") as pf:
-        pf.write(row["repo_name"] + "\n")
-    done_repos.add(row["repo_name"])
-
-    # Save batch to CSV
-    if len(batch) >= BATCH_SIZE:
-        df_batch = pd.DataFrame(batch)
-        df_batch.to_csv(OUTPUT_FILE, mode="a", header=not file_exists, index=False)
-        file_exists = True
-        batch = []
-
-    # Progress report every 100 repos
-    processed = len(done_repos)
-    if processed % 100 == 0:
-        elapsed  = (time.time() - start_time) / 60
-        pct      = processed / total * 100
-        remaining = (elapsed / pct * (100 - pct)) if pct > 0 else 0
-        print(f"  [{processed}/{total}] {pct:.1f}% | "
-              f"Elapsed: {elapsed:.0f}m | "
-              f"Est. remaining: {remaining:.0f}m | "
-              f"Rate limit: {rate_limit_remaining} pts left")
-
-    # Polite delay between repos — keeps us well under rate limit
-    time.sleep(0.8)
-
-# Save any remaining batch
-if batch:
-    df_batch = pd.DataFrame(batch)
-    df_batch.to_csv(OUTPUT_FILE, mode="a", header=not file_exists, index=False)
-
-print(f"\n✅ Step 3 complete! Results saved to {OUTPUT_FILE}")
\ No newline at end of file
+async def run_cohort(client, cohort, parents):
+    repos_df   = pd.read_csv(cohort.activity_file)[["repo_name"]].copy()
+    repos_meta = pd.read_csv(cohort.repos_table)[["repo_name", "created_at"]]
+    repos_df   = repos_df.merge(repos_meta, on="repo_name", how="left")
+
+    print(f"\n=== Step 3: {cohort.name} ===")
+
+    # Load already processed repos for resume
+    done_repos = set()
+    if os.path.exists(cohort.step3_progress):
+        with open(cohort.step3_progress) as f:
+            done_repos = set(line.strip() for line in f if line.strip())
+        print(f"Resuming — {len(done_repos)} repos already done, "
+              f"{len(repos_df) - len(done_repos)} remaining.")
+
+    # Check if output file exists (for append mode)
+    file_exists = os.path.exists(cohort.governance_file)
+
+    total      = len(repos_df)
+    batch      = []
+    finished   = []   # repos whose rows are in batch, marked done once it is saved
+    metadata   = {}
+    start_time = time.time()
+
+    pending = [(row["repo_name"], row["created_at"]) for _, row in repos_df.iterrows()
+               if row["repo_name"] not in done_repos]
+    groups  = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+    fields  = REPO_FIELDS if cohort.divergence else NONFORK_REPO_FIELDS
+
+    def save_batch():
+        nonlocal file_exists, batch, finished
+        if batch:
+            df_batch = pd.DataFrame(batch)
+            df_batch.to_csv(cohort.governance_file, mode="a", header=not file_exists, index=False)
+            file_exists = True
+        # Mark progress only after the rows are on disk
+        with open(cohort.step3_progress, "a") as pf:
+            pf.write("".join(repo_name + "\n" for repo_name in finished))
+        batch, finished = [], []
+
+    # --- Pass 1: governance + metadata of every repo ---
+    todo = iter(groups)
+    async def metadata_worker():
+        for repos in todo:
+            metadata.update(await get_group_metadata(client, repos, fields))
+    await asyncio.gather(*(metadata_worker() for _ in range(REPOS_IN_FLIGHT)))
+    print(f"Metadata: {len(metadata)}/{len(pending)} repos found")
+
+    # --- Pass 2: parents, over the union of their forks' windows ---
+    if cohort.divergence:
+        try:
+            await parents.fill(client, parent_windows(pending, metadata), parent_sizer)
+        finally:
+            parents.save()
+
+    # --- Pass 3: divergence, saved group by group ---
+    todo = iter(groups)
+    async def worker():
+        for repos in todo:
+            if cohort.divergence:
+                records = await get_group_divergence(client, repos, metadata, parents)
+            else:
+                records = metadata_only_records(repos, metadata)
+            batch.extend(records)
+            finished.extend(repo_name for repo_name, _ in repos)
+            done_repos.update(repo_name for repo_name, _ in repos)
+
+            # Save batch to CSV
+            save_batch()
+
+            # Progress report after every group
+            processed = len(done_repos)
+            elapsed   = (time.time() - start_time) / 60
+            pct       = processed / total * 100
+            remaining = (elapsed / pct * (100 - pct)) if pct > 0 else 0
+            print(f"  [{processed}/{total}] {pct:.1f}% | "
+                  f"Elapsed: {elapsed:.0f}m | "
+                  f"Est. remaining: {remaining:.0f}m | "
+                  f"Rate limit: {client.remaining} pts left")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(REPOS_IN_FLIGHT)))
+    finally:
+        # Save any remaining batch (also if interrupted)
+        save_batch()
+    print(f"Results saved to {cohort.governance_file}")
+
+
+async def main(cohorts=None):
+    cohorts = cohorts or selected()
+    parents = ParentCache()
+    cache   = ResponseCache()
+    async with AsyncGraphQLClient(GITHUB_TOKENS, GRAPHQL_URL, cache=cache) as client:
+        for cohort in cohorts:
+            await run_cohort(client, cohort, parents)
+        print(client.metrics.summary())
+    print(cache.summary())
+    print(f"\n✅ Step 3 complete! ({', '.join(cohort.name for cohort in cohorts)})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
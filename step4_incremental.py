@@ -0,0 +1,135 @@
+"""
+Incremental Step 4: recompute derived metrics only for the repos whose
+inputs changed since the last run. Shared by step4_derived.py and
+nonfork_step4_derived.py.
+
+Every repo gets a fingerprint of its rows in each input CSV (repos table,
+activity, responsiveness, contributor rows, governance), kept in a JSON
+sidecar next to the output (final_dataset.csv -> final_dataset.fingerprints.json).
+On a rerun, repos whose fingerprint is unchanged keep their rows from the
+previous output; only the others are recomputed and upserted. The result
+is the same file as a full run, byte for byte (check_step4_incremental.py
+checks this on synthetic inputs).
+
+Everything is recomputed when there is no previous output, when an input
+gained or lost columns, or when the Step 4 code itself changed (the sidecar
+keeps a hash of the script and contributor_metrics.py). Delete the sidecar
+to force a full run.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def repo_digests(df):
+    """uint64 per repo_name over its rows (values and order), as a Series."""
+    df    = df[df["repo_name"].notna()]
+    codes, names = pd.factorize(df["repo_name"])
+    # Row order within a repo matters (contributor_health keeps file order within a month)
+    position = df.groupby(codes).cumcount().to_numpy()
+    rows  = pd.util.hash_pandas_object(df.assign(_position=position), index=False).to_numpy()
+
+    order  = np.argsort(codes, kind="stable")
+    codes  = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+    digest = np.bitwise_xor.reduceat(rows[order], starts) if len(starts) else np.array([], dtype=np.uint64)
+    return pd.Series(digest, index=names[codes[starts]], dtype=np.uint64)
+
+
+def full_run_dtypes(df):
+    """
+    df with the column dtypes a full run would give it, so both write the
+    same text. pd.concat already widens int + float to float; what's left
+    are object columns that only hold numbers or bools because one side
+    was all missing (e.g. no contributor rows among the recomputed repos).
+    """
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].dropna()
+        kind   = pd.api.types.infer_dtype(values, skipna=True)
+        if kind in ("integer", "floating", "mixed-integer-float"):
+            # ints next to missing values are floats in a full run
+            whole   = kind == "integer" and len(values) == len(df)
+            df[col] = df[col].astype(np.int64 if whole else float)
+        elif kind == "boolean" and len(values) == len(df):
+            df[col] = df[col].astype(bool)
+    return df
+
+
+def file_hash(paths):
+    sha = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+class IncrementalStep4:
+    def __init__(self, output_file, inputs, code_files):
+        """
+        inputs: {name: DataFrame with a repo_name column}, including "repos"
+        (the repos table, which decides the output rows and their order).
+        code_files: the files whose changes invalidate every stored row.
+        """
+        self.output_file  = output_file
+        self.sidecar_file = os.path.splitext(output_file)[0] + ".fingerprints.json"
+        self.repo_order   = inputs["repos"]["repo_name"].dropna().drop_duplicates()
+        self.signature    = {
+            "code":    file_hash(code_files),
+            "columns": {name: list(df.columns) for name, df in inputs.items()},
+        }
+
+        # One fingerprint per repo of the repos table, over all of its inputs
+        digests = pd.DataFrame({
+            name: repo_digests(df).reindex(self.repo_order, fill_value=0).to_numpy()
+            for name, df in inputs.items()
+        }, index=self.repo_order)
+        self.fingerprints = dict(zip(self.repo_order,
+                                     pd.util.hash_pandas_object(digests, index=False).astype(str)))
+
+        self.previous = self._load_previous()
+        self.changed  = {repo for repo, fp in self.fingerprints.items()
+                         if self.previous.get(repo) != fp}
+
+    def _load_previous(self):
+        """Stored fingerprints, or {} when the stored rows can't be reused."""
+        if not (os.path.exists(self.sidecar_file) and os.path.exists(self.output_file)):
+            return {}
+        with open(self.sidecar_file) as f:
+            stored = json.load(f)
+        if stored.get("signature") != self.signature:
+            return {}
+        return stored["fingerprints"]
+
+    def only_changed(self, df):
+        """The rows of df that belong to repos to recompute."""
+        return df[df["repo_name"].isin(self.changed)]
+
+    def upsert(self, df_new, columns):
+        """
+        df_new (the recomputed repos) plus the unchanged repos' rows of the
+        previous output, restricted to columns, in repos-table order.
+        """
+        df_new = df_new[[c for c in columns if c in df_new.columns]]
+        if len(self.changed) == len(self.fingerprints):
+            return df_new.reset_index(drop=True)
+
+        # Only empty cells are missing, and floats read back exactly as written
+        df_old = pd.read_csv(self.output_file, keep_default_na=False, na_values=[""],
+                             float_precision="round_trip")
+        df_old = df_old[~df_old["repo_name"].isin(self.changed)
+                        & df_old["repo_name"].isin(self.fingerprints)]
+        df_old = df_old[[c for c in columns if c in df_old.columns]]
+
+        df = pd.concat([df_old, df_new], ignore_index=True) if len(df_new) else df_old
+        position = pd.Series(np.arange(len(self.repo_order)), index=self.repo_order)
+        df = df.iloc[np.argsort(df["repo_name"].map(position).to_numpy(), kind="stable")]
+        return full_run_dtypes(df.reset_index(drop=True))
+
+    def save(self):
+        tmp = self.sidecar_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"signature": self.signature, "fingerprints": self.fingerprints}, f)
+        os.replace(tmp, self.sidecar_file)
@@ -0,0 +1,118 @@
+"""
+Sustainability-window PushEvent detection as a GH Archive scanner consumer.
+A repo is "sustainable" (1) if it had at least 1 commit
+between month 18 and month 24 after its creation date.
+Shared by sustainability_labels.py, nonfork_sustainability_labels.py
+and single_pass_scan.py.
+
+The consumer only asks for hours in which some repo it hasn't resolved yet
+has its window, so the scanner skips hours outside every window and stops
+downloading once every repo has a commit in its window.
+"""
+from collections import defaultdict
+import calendar
+import numpy as np
+import pandas as pd
+
+from gharchive_scanner import Consumer, parse_timestamp
+
+# ---------------------------------------------------------------
+# SUSTAINABILITY WINDOW
+# Month 18 to month 24 after creation = 548 to 730 days
+# ---------------------------------------------------------------
+WINDOW_START_DAYS = 548   # ~18 months
+WINDOW_END_DAYS   = 730   # ~24 months
+
+
+class SustainabilityState:
+    def __init__(self):
+        # repo -> True once a commit is found (only found repos are stored,
+        # so len() is the number resolved)
+        self.has_commit_in_window = defaultdict(bool)
+
+    def merge(self, other):
+        for repo, found in other.has_commit_in_window.items():
+            if found:
+                self.has_commit_in_window[repo] = True
+        return self
+
+
+class SustainabilityConsumer(Consumer):
+    event_types = {"PushEvent"}
+
+    def __init__(self, name, repo_lookup, start_date, end_date, progress_file=None):
+        super().__init__(name, repo_lookup, start_date, end_date, progress_file)
+        # Window of each repo as [start, end) epoch seconds: whole days 548..730 after creation
+        self._repo_index   = {repo: i for i, repo in enumerate(repo_lookup)}
+        created            = pd.to_datetime(pd.Series(list(repo_lookup.values()), dtype=object), utc=True)
+        created            = (created - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()  # NaT -> NaN, never live
+        self._window_start = created + WINDOW_START_DAYS * 86400
+        self._window_end   = created + (WINDOW_END_DAYS + 1) * 86400
+        self._windows      = dict(zip(repo_lookup, zip(self._window_start.tolist(), self._window_end.tolist())))
+        self._unresolved   = np.ones(len(created), dtype=bool)
+        self._n_resolved   = 0
+
+    def new_state(self):
+        return SustainabilityState()
+
+    def live_repos(self, hour_start):
+        """Unresolved repos whose window overlaps the hour starting at hour_start (naive UTC)."""
+        found = self.state.has_commit_in_window
+        if len(found) != self._n_resolved:
+            self._unresolved[[self._repo_index[repo] for repo in found]] = False
+            self._n_resolved = len(found)
+        t = calendar.timegm(hour_start.timetuple())
+        return int(np.count_nonzero(self._unresolved & (self._window_start < t + 3600) & (self._window_end > t)))
+
+    def needs(self, filename, hour_start):
+        return super().needs(filename, hour_start) and self.live_repos(hour_start) > 0
+
+    def in_sustainability_window(self, repo_name, event_time):
+        """event_time in epoch seconds; whole days WINDOW_START_DAYS..WINDOW_END_DAYS after creation."""
+        window = self._windows.get(repo_name)
+        return window is not None and window[0] <= event_time < window[1]
+
+    def process_event(self, event, state):
+        if event.get("type") != "PushEvent":
+            return
+
+        repo_name = event.get("repo", {}).get("name")
+        if repo_name not in self.repo_set:
+            return
+
+        # Skip if already confirmed sustainable
+        if repo_name in state.has_commit_in_window:
+            return
+
+        event_time = parse_timestamp(event.get("created_at"))
+        if event_time is not None and self.in_sustainability_window(repo_name, event_time):
+            state.has_commit_in_window[repo_name] = True
+
+    def summary(self):
+        return f"Sustainable so far: {sum(self.state.has_commit_in_window.values())}"
+
+    def labels(self):
+        labels = []
+        for repo in self.repo_set:
+            labels.append({
+                "repo_name":      repo,
+                "is_sustainable": 1 if self.state.has_commit_in_window.get(repo) else 0
+            })
+        df_labels = pd.DataFrame(labels)
+
+        sustainable   = df_labels["is_sustainable"].sum()
+        unsustainable = len(df_labels) - sustainable
+        print(f"[{self.name}] Sustainability labels:")
+        print(f"  Sustainable (1):     {sustainable} ({sustainable/len(df_labels)*100:.1f}%)")
+        print(f"  Not sustainable (0): {unsustainable} ({unsustainable/len(df_labels)*100:.1f}%)")
+        return df_labels
+
+
+def merge_labels(df_labels, dataset_file):
+    """Add (or replace) the is_sustainable column of a final dataset CSV."""
+    df_final = pd.read_csv(dataset_file)
+    df_final = df_final.drop(columns=["is_sustainable"], errors="ignore")
+    df_final = df_final.merge(df_labels, on="repo_name", how="left")
+    df_final.to_csv(dataset_file, index=False)
+    print(f"\n✅ Saved! {dataset_file} now has {len(df_final)} rows and {len(df_final.columns)} columns.")
+    print(f"   Column added: 'is_sustainable' (0 or 1)")
@@ -0,0 +1,174 @@
+"""
+Synthetic GH Archive hours for benchmarks and offline runs.
+Writes <YYYY-MM-DD-H>.json.gz files laid out like data.gharchive.org
+(one compact JSON event per line, same key order as the real archive),
+so the output directory can be used as ARCHIVE_URL in gharchive_scanner.py.
+
+Configurable: event mix, number of tracked repos, hit rate (share of
+events that touch a tracked repo — about 0.1% in the real archive),
+events per hour and number of hours.
+
+    python synthetic_gharchive.py    # writes synthetic_archive/ + synthetic_repos_table.csv
+"""
+import gzip, json, os, random
+from datetime import datetime, timedelta
+import pandas as pd
+
+# ---------------------------------------------------------------
+# DEFAULTS
+# EVENT_MIX is roughly the share of each type in a real archive hour
+# ---------------------------------------------------------------
+EVENT_MIX = {
+    "PushEvent":                     0.50,
+    "CreateEvent":                   0.13,
+    "PullRequestEvent":              0.08,
+    "IssueCommentEvent":             0.06,
+    "WatchEvent":                    0.06,
+    "DeleteEvent":                   0.04,
+    "PullRequestReviewEvent":        0.03,
+    "IssuesEvent":                   0.03,
+    "ForkEvent":                     0.02,
+    "PullRequestReviewCommentEvent": 0.02,
+    "ReleaseEvent":                  0.01,
+    "GollumEvent":                   0.01,
+    "MemberEvent":                   0.01,
+}
+REPO_COUNT      = 1000
+HIT_RATE        = 0.01
+EVENTS_PER_HOUR = 20_000
+HOURS           = 24
+START           = datetime(2024, 1, 1)
+SEED            = 260
+
+OUTPUT_DIR  = "synthetic_archive"
+REPOS_TABLE = "synthetic_repos_table.csv"
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+WORDS = ("fix update add remove refactor docs test bump release merge branch "
+         "feature cleanup typo build config issue support error").split()
+
+
+def make_repos(repo_count=REPO_COUNT, created=START, seed=SEED):
+    """repos_table-style frame of tracked repos, created up to 30 days before `created`."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(repo_count):
+        created_at = created - timedelta(seconds=rng.randint(0, 30 * 86400))
+        rows.append({
+            "repo_name":       f"owner{i}/project{i}",
+            "created_at":      created_at.strftime(TIME_FORMAT),
+            "is_fork":         True,
+            "fork_owner_type": "User",
+        })
+    return pd.DataFrame(rows)
+
+
+def _text(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def make_event(rng, event_type, repo_name, created_at):
+    """One archive event (dict) with a payload shaped like the real one for that type."""
+    login   = f"user{rng.randint(0, 50_000)}"
+    number  = rng.randint(1, 300)
+    opened  = (created_at - timedelta(seconds=rng.randint(0, 14 * 86400))).strftime(TIME_FORMAT)
+
+    if event_type == "PushEvent":
+        commits = [{"sha": f"{rng.getrandbits(160):040x}",
+                    "author": {"email": f"{login}@example.com", "name": login},
+                    "message": _text(rng, rng.randint(3, 30)), "distinct": True}
+                   for _ in range(rng.randint(1, 3))]
+        payload = {"repository_id": rng.randint(1, 10**9), "push_id": rng.randint(1, 10**10),
+                   "size": len(commits), "distinct_size": len(commits), "ref": "refs/heads/main",
+                   "head": commits[-1]["sha"], "before": f"{rng.getrandbits(160):040x}",
+                   "commits": commits}
+    elif event_type == "IssuesEvent":
+        payload = {"action": rng.choice(["opened", "closed", "reopened"]),
+                   "issue": {"number": number, "title": _text(rng, 6), "user": {"login": login},
+                             "state": "open", "created_at": opened, "body": _text(rng, rng.randint(10, 120))}}
+    elif event_type == "PullRequestEvent":
+        payload = {"action": rng.choice(["opened", "closed", "synchronize"]), "number": number,
+                   "pull_request": {"number": number, "title": _text(rng, 6), "user": {"login": login},
+                                    "created_at": opened, "merged": rng.random() < 0.6,
+                                    "body": _text(rng, rng.randint(10, 120)),
+                                    "commits": rng.randint(1, 10), "additions": rng.randint(1, 500)}}
+    elif event_type == "IssueCommentEvent":
+        payload = {"action": "created", "issue": {"number": number, "created_at": opened},
+                   "comment": {"user": {"login": login}, "body": _text(rng, rng.randint(5, 80))}}
+    elif event_type == "PullRequestReviewCommentEvent":
+        payload = {"action": "created", "pull_request": {"number": number, "created_at": opened},
+                   "comment": {"user": {"login": login}, "body": _text(rng, rng.randint(5, 60))}}
+    elif event_type == "ReleaseEvent":
+        payload = {"action": "published", "release": {"tag_name": f"v{rng.randint(0, 9)}.{rng.randint(0, 20)}"}}
+    elif event_type == "WatchEvent":
+        payload = {"action": "started"}
+    elif event_type == "CreateEvent":
+        payload = {"ref": "main", "ref_type": rng.choice(["branch", "tag", "repository"]),
+                   "master_branch": "main", "description": _text(rng, 8), "pusher_type": "user"}
+    else:
+        payload = {"action": "created"}
+
+    return {
+        "id":         str(rng.randint(10**10, 10**11)),
+        "type":       event_type,
+        "actor":      {"id": rng.randint(1, 10**8), "login": login, "display_login": login,
+                       "gravatar_id": "", "url": f"https://api.github.com/users/{login}",
+                       "avatar_url": f"https://avatars.githubusercontent.com/u/{rng.randint(1, 10**8)}?"},
+        "repo":       {"id": rng.randint(1, 10**9), "name": repo_name,
+                       "url": f"https://api.github.com/repos/{repo_name}"},
+        "payload":    payload,
+        "public":     True,
+        "created_at": created_at.strftime(TIME_FORMAT),
+    }
+
+
+def write_archive(output_dir, repo_names, start=START, hours=HOURS, events_per_hour=EVENTS_PER_HOUR,
+                  hit_rate=HIT_RATE, event_mix=None, seed=SEED):
+    """
+    Write `hours` hourly files starting at `start`. Returns
+    {"files", "events", "tracked_events", "bytes"} for the whole archive.
+    """
+    event_mix  = event_mix or EVENT_MIX
+    types      = list(event_mix)
+    weights    = [event_mix[t] for t in types]
+    repo_names = list(repo_names)
+    rng        = random.Random(seed)
+    stats      = {"files": 0, "events": 0, "tracked_events": 0, "bytes": 0}
+    os.makedirs(output_dir, exist_ok=True)
+
+    for h in range(hours):
+        hour_start = start + timedelta(hours=h)
+        event_types = rng.choices(types, weights, k=events_per_hour)
+        lines = []
+        for event_type in event_types:
+            if repo_names and rng.random() < hit_rate:
+                repo_name = rng.choice(repo_names)
+                stats["tracked_events"] += 1
+            else:
+                repo_name = f"other{rng.randint(0, 10**7)}/repo{rng.randint(0, 99)}"
+            created_at = hour_start + timedelta(seconds=rng.randint(0, 3599))
+            lines.append(json.dumps(make_event(rng, event_type, repo_name, created_at),
+                                    separators=(",", ":")))
+
+        filename = f"{hour_start.strftime('%Y-%m-%d')}-{hour_start.hour}.json.gz"
+        path     = os.path.join(output_dir, filename)
+        with gzip.open(path, "wt", compresslevel=6) as f:
+            f.write("\n".join(lines) + "\n")
+        stats["files"]  += 1
+        stats["events"] += len(lines)
+        stats["bytes"]  += os.path.getsize(path)
+    return stats
+
+
+def main():
+    df_repos = make_repos()
+    df_repos.to_csv(REPOS_TABLE, index=False)
+    print(f"Saved {REPOS_TABLE} — {len(df_repos)} repos")
+
+    stats = write_archive(OUTPUT_DIR, df_repos["repo_name"])
+    print(f"Wrote {stats['files']} hourly files to {OUTPUT_DIR}/ — {stats['events']} events, "
+          f"{stats['tracked_events']} for tracked repos, {stats['bytes'] / 1024**2:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
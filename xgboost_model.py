@@ -18,17 +18,7 @@ import warnings
 warnings.filterwarnings("ignore")
 
 # ---------------------------------------------------------------
-# 1. LOAD DATA
-# ---------------------------------------------------------------
-print("Loading datasets...")
-df_fork    = pd.read_csv("final_dataset.csv")
-df_nonfork = pd.read_csv("final_dataset_nonfork.csv")
-
-print(f"Forks:     {len(df_fork)} rows")
-print(f"Non-forks: {len(df_nonfork)} rows")
-
-# ---------------------------------------------------------------
-# 2. DEFINE FEATURES
+# 1. DEFINE FEATURES
 # ---------------------------------------------------------------
 DROP_ALWAYS = [
     "repo_name", "created_at", "parent_repo", "parent_created_at",
@@ -41,7 +31,7 @@ FORK_ONLY_COLS = [
 ]
 
 # ---------------------------------------------------------------
-# 3. PREPROCESSING FUNCTION
+# 2. PREPROCESSING FUNCTION
 # ---------------------------------------------------------------
 def preprocess(df, is_fork_model=True):
     df = df.copy()
@@ -81,7 +71,7 @@ def preprocess(df, is_fork_model=True):
     return X, y, feature_cols
 
 # ---------------------------------------------------------------
-# 4. TRAIN WITH PROPER K-FOLD + SMOTE INSIDE EACH FOLD
+# 3. TRAIN WITH PROPER K-FOLD + SMOTE INSIDE EACH FOLD
 # ---------------------------------------------------------------
 def train_kfold_xgboost(X, y, label, n_splits=5):
     print(f"\n{'='*60}")
@@ -160,7 +150,7 @@ def train_kfold_xgboost(X, y, label, n_splits=5):
     return mean_auc, std_auc, mean_importances
 
 # ---------------------------------------------------------------
-# 5. FEATURE IMPORTANCE FUNCTION
+# 4. FEATURE IMPORTANCE FUNCTION
 # ---------------------------------------------------------------
 def get_feature_importance(mean_importances, feature_cols, label, top_n=15):
     importance = pd.DataFrame({
@@ -175,69 +165,85 @@ def get_feature_importance(mean_importances, feature_cols, label, top_n=15):
 
     return importance
 
-# ---------------------------------------------------------------
-# 6. RUN FORK MODEL
-# ---------------------------------------------------------------
-X_fork, y_fork, fork_features = preprocess(df_fork, is_fork_model=True)
-auc_fork, std_fork, imp_fork  = train_kfold_xgboost(X_fork, y_fork, "FORKS")
-importance_fork = get_feature_importance(imp_fork, fork_features, "FORKS")
 
-# ---------------------------------------------------------------
-# 7. RUN NON-FORK MODEL
-# ---------------------------------------------------------------
-X_nonfork, y_nonfork, nonfork_features = preprocess(df_nonfork, is_fork_model=False)
-auc_nonfork, std_nonfork, imp_nonfork  = train_kfold_xgboost(X_nonfork, y_nonfork, "NON-FORKS")
-importance_nonfork = get_feature_importance(imp_nonfork, nonfork_features, "NON-FORKS")
-
-# ---------------------------------------------------------------
-# 8. COMPARISON PLOT
-# ---------------------------------------------------------------
-print("\nGenerating comparison plot...")
-
-fig, axes = plt.subplots(1, 2, figsize=(18, 8))
-
-top_fork = importance_fork.head(15)
-axes[0].barh(top_fork["feature"][::-1], top_fork["importance"][::-1], color="steelblue")
-axes[0].set_title(f"Top 15 Features — FORKS\nAUC-ROC: {auc_fork:.4f} ± {std_fork:.4f}", fontsize=14)
-axes[0].set_xlabel("Feature Importance (avg across 5 folds)")
-axes[0].tick_params(axis="y", labelsize=10)
-
-top_nonfork = importance_nonfork.head(15)
-axes[1].barh(top_nonfork["feature"][::-1], top_nonfork["importance"][::-1], color="darkorange")
-axes[1].set_title(f"Top 15 Features — NON-FORKS\nAUC-ROC: {auc_nonfork:.4f} ± {std_nonfork:.4f}", fontsize=14)
-axes[1].set_xlabel("Feature Importance (avg across 5 folds)")
-axes[1].tick_params(axis="y", labelsize=10)
-
-plt.suptitle("Early Predictors of OSS Sustainability: Forks vs Non-Forks", fontsize=16)
-plt.tight_layout()
-plt.savefig("feature_importance_comparison_kfold.png", dpi=150, bbox_inches="tight")
-plt.show()
-print("Saved to feature_importance_comparison_kfold.png")
-
-# ---------------------------------------------------------------
-# 9. SAVE RESULTS
-# ---------------------------------------------------------------
-importance_fork.to_csv("feature_importance_forks_kfold.csv", index=False)
-importance_nonfork.to_csv("feature_importance_nonfork_kfold.csv", index=False)
-
-# ---------------------------------------------------------------
-# 10. FINAL SUMMARY
-# ---------------------------------------------------------------
-print("\n" + "="*60)
-print("FINAL SUMMARY")
-print("="*60)
-print(f"Fork model AUC-ROC:     {auc_fork:.4f} ± {std_fork:.4f}")
-print(f"Non-fork model AUC-ROC: {auc_nonfork:.4f} ± {std_nonfork:.4f}")
-
-print("\nTop 5 features for FORKS:")
-for _, r in importance_fork.head(5).iterrows():
-    print(f"  {r['feature']:<40} {r['importance']:.4f}")
-
-print("\nTop 5 features for NON-FORKS:")
-for _, r in importance_nonfork.head(5).iterrows():
-    print(f"  {r['feature']:<40} {r['importance']:.4f}")
-
-print("\nOutput files:")
-print("  feature_importance_comparison_kfold.png")
-print("  feature_importance_forks_kfold.csv")
-print("  feature_importance_nonfork_kfold.csv")
\ No newline at end of file
+def main():
+    # ---------------------------------------------------------------
+    # 5. LOAD DATA
+    # ---------------------------------------------------------------
+    print("Loading datasets...")
+    df_fork    = pd.read_csv("final_dataset.csv")
+    df_nonfork = pd.read_csv("final_dataset_nonfork.csv")
+
+    print(f"Forks:     {len(df_fork)} rows")
+    print(f"Non-forks: {len(df_nonfork)} rows")
+
+    # ---------------------------------------------------------------
+    # 6. RUN FORK MODEL
+    # ---------------------------------------------------------------
+    X_fork, y_fork, fork_features = preprocess(df_fork, is_fork_model=True)
+    auc_fork, std_fork, imp_fork  = train_kfold_xgboost(X_fork, y_fork, "FORKS")
+    importance_fork = get_feature_importance(imp_fork, fork_features, "FORKS")
+
+    # ---------------------------------------------------------------
+    # 7. RUN NON-FORK MODEL
+    # ---------------------------------------------------------------
+    X_nonfork, y_nonfork, nonfork_features = preprocess(df_nonfork, is_fork_model=False)
+    auc_nonfork, std_nonfork, imp_nonfork  = train_kfold_xgboost(X_nonfork, y_nonfork, "NON-FORKS")
+    importance_nonfork = get_feature_importance(imp_nonfork, nonfork_features, "NON-FORKS")
+
+    # ---------------------------------------------------------------
+    # 8. COMPARISON PLOT
+    # ---------------------------------------------------------------
+    print("\nGenerating comparison plot...")
+
+    fig, axes = plt.subplots(1, 2, figsize=(18, 8))
+
+    top_fork = importance_fork.head(15)
+    axes[0].barh(top_fork["feature"][::-1], top_fork["importance"][::-1], color="steelblue")
+    axes[0].set_title(f"Top 15 Features — FORKS\nAUC-ROC: {auc_fork:.4f} ± {std_fork:.4f}", fontsize=14)
+    axes[0].set_xlabel("Feature Importance (avg across 5 folds)")
+    axes[0].tick_params(axis="y", labelsize=10)
+
+    top_nonfork = importance_nonfork.head(15)
+    axes[1].barh(top_nonfork["feature"][::-1], top_nonfork["importance"][::-1], color="darkorange")
+    axes[1].set_title(f"Top 15 Features — NON-FORKS\nAUC-ROC: {auc_nonfork:.4f} ± {std_nonfork:.4f}", fontsize=14)
+    axes[1].set_xlabel("Feature Importance (avg across 5 folds)")
+    axes[1].tick_params(axis="y", labelsize=10)
+
+    plt.suptitle("Early Predictors of OSS Sustainability: Forks vs Non-Forks", fontsize=16)
+    plt.tight_layout()
+    plt.savefig("feature_importance_comparison_kfold.png", dpi=150, bbox_inches="tight")
+    plt.show()
+    print("Saved to feature_importance_comparison_kfold.png")
+
+    # ---------------------------------------------------------------
+    # 9. SAVE RESULTS
+    # ---------------------------------------------------------------
+    importance_fork.to_csv("feature_importance_forks_kfold.csv", index=False)
+    importance_nonfork.to_csv("feature_importance_nonfork_kfold.csv", index=False)
+
+    # ---------------------------------------------------------------
+    # 10. FINAL SUMMARY
+    # ---------------------------------------------------------------
+    print("\n" + "="*60)
+    print("FINAL SUMMARY")
+    print("="*60)
+    print(f"Fork model AUC-ROC:     {auc_fork:.4f} ± {std_fork:.4f}")
+    print(f"Non-fork model AUC-ROC: {auc_nonfork:.4f} ± {std_nonfork:.4f}")
+
+    print("\nTop 5 features for FORKS:")
+    for _, r in importance_fork.head(5).iterrows():
+        print(f"  {r['feature']:<40} {r['importance']:.4f}")
+
+    print("\nTop 5 features for NON-FORKS:")
+    for _, r in importance_nonfork.head(5).iterrows():
+        print(f"  {r['feature']:<40} {r['importance']:.4f}")
+
+    print("\nOutput files:")
+    print("  feature_importance_comparison_kfold.png")
+    print("  feature_importance_forks_kfold.csv")
+    print("  feature_importance_nonfork_kfold.csv")
+
+
+if __name__ == "__main__":
+    main()